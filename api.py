@@ -1,94 +1,288 @@
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+import hashlib
+import os
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from fastapi import FastAPI, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
+from markupsafe import Markup
 
-from blackjack import Game
-from llm import get_recommendation
+from blackjack import Card, Game, Rank, Suit
+from llm import build_position, get_recommendation
+from protocol import (
+    ACTIONS,
+    encode,
+    game_state,
+    legal_actions,
+    parse_action,
+    state_diff,
+)
+from rules import parse_rules
+from sessions import SESSION_COOKIE, SESSION_TTL, get_session_store, new_session_id
 from strategy import get_optimal_play
 
-app = FastAPI()
+TEMPLATES = (
+    "index.html",
+    "partials/card.html",
+    "partials/game.html",
+    "partials/llm.html",
+    "partials/optimal.html",
+    "partials/recommendations.html",
+)
+
 templates = Jinja2Templates(directory="templates")
 
-game = Game()
+
+@lru_cache(maxsize=len(Rank) * len(Suit))
+def render_card(rank: Rank, suit: Suit) -> Markup:
+    return Markup(
+        templates.get_template("partials/card.html").render(rank=rank, suit=suit)
+    )
+
+
+def card_html(card: Card) -> Markup:
+    return render_card(card.rank, card.suit)
+
+
+templates.env.filters["card_html"] = card_html
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    for name in TEMPLATES:
+        templates.get_template(name)
+    for rank in Rank:
+        for suit in Suit:
+            render_card(rank, suit)
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+def load_game(request: Request) -> tuple[str | None, Game]:
+    session_id = request.cookies.get(SESSION_COOKIE)
+    game = get_session_store().get(session_id) if session_id else None
+    if game is None:
+        return None, Game()
+    return session_id, game
+
+
+def read_game(request: Request) -> tuple[str | None, Game]:
+    session_id, game = load_game(request)
+    if session_id:
+        get_session_store().touch(session_id)
+    return session_id, game
+
+
+def save_game(session_id: str | None, game: Game) -> str:
+    session_id = session_id or new_session_id()
+    get_session_store().put(session_id, game)
+    return session_id
+
+
+def set_session_cookie(response: Response, session_id: str | None):
+    if session_id:
+        response.set_cookie(
+            SESSION_COOKIE,
+            session_id,
+            max_age=SESSION_TTL,
+            httponly=True,
+            samesite="lax",
+        )
+
+
+def render(
+    request: Request,
+    template: str,
+    session_id: str | None,
+    game: Game,
+    etag: str | None = None,
+    **context,
+) -> HTMLResponse:
+    response = templates.TemplateResponse(request, template, {"game": game, **context})
+    set_session_cookie(response, session_id)
+    if etag:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def position_etag(game: Game, kind: str) -> str:
+    state = kind
+    if game.round_active and game.current_hand:
+        dealer_upcard = str(game.dealer_hand.cards[0])
+        state += build_position(game.current_hand, dealer_upcard, game.rules)
+    return '"' + hashlib.sha256(state.encode()).hexdigest()[:16] + '"'
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag in tags
+
+
+def not_modified(
+    request: Request, session_id: str | None, etag: str
+) -> Response | None:
+    if not etag_matches(request.headers.get("if-none-match", ""), etag):
+        return None
+    response = Response(
+        status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+    )
+    set_session_cookie(response, session_id)
+    return response
 
 
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
-    return templates.TemplateResponse(
-        "index.html",
-        {"request": request, "game": game},
-    )
+    session_id, game = read_game(request)
+    return render(request, "index.html", session_id, game)
 
 
 @app.post("/deal", response_class=HTMLResponse)
 async def deal(request: Request):
+    session_id, game = load_game(request)
     game.deal()
-    return templates.TemplateResponse(
-        "partials/game.html",
-        {"request": request, "game": game},
-    )
+    session_id = save_game(session_id, game)
+    return render(request, "partials/game.html", session_id, game)
 
 
 @app.post("/hit", response_class=HTMLResponse)
 async def hit(request: Request):
+    session_id, game = load_game(request)
     game.hit()
-    return templates.TemplateResponse(
-        "partials/game.html",
-        {"request": request, "game": game},
-    )
+    session_id = save_game(session_id, game)
+    return render(request, "partials/game.html", session_id, game)
 
 
 @app.post("/stand", response_class=HTMLResponse)
 async def stand(request: Request):
+    session_id, game = load_game(request)
     game.stand()
-    return templates.TemplateResponse(
-        "partials/game.html",
-        {"request": request, "game": game},
-    )
+    session_id = save_game(session_id, game)
+    return render(request, "partials/game.html", session_id, game)
 
 
 @app.post("/double", response_class=HTMLResponse)
 async def double(request: Request):
+    session_id, game = load_game(request)
     game.double_down()
-    return templates.TemplateResponse(
-        "partials/game.html",
-        {"request": request, "game": game},
-    )
+    session_id = save_game(session_id, game)
+    return render(request, "partials/game.html", session_id, game)
 
 
 @app.post("/split", response_class=HTMLResponse)
 async def split(request: Request):
+    session_id, game = load_game(request)
     game.split()
-    return templates.TemplateResponse(
-        "partials/game.html",
-        {"request": request, "game": game},
-    )
+    session_id = save_game(session_id, game)
+    return render(request, "partials/game.html", session_id, game)
 
 
 @app.post("/surrender", response_class=HTMLResponse)
 async def surrender(request: Request):
+    session_id, game = load_game(request)
     game.surrender()
-    return templates.TemplateResponse(
-        "partials/game.html",
-        {"request": request, "game": game},
-    )
+    session_id = save_game(session_id, game)
+    return render(request, "partials/game.html", session_id, game)
+
+
+def current_optimal(game: Game) -> str | None:
+    if game.round_active and game.current_hand:
+        return get_optimal_play(game.current_hand, game.dealer_hand)
+    return None
+
+
+def sse_event(event: str, html: str) -> str:
+    data = "".join(f"data: {line}\n" for line in html.splitlines())
+    return f"event: {event}\n{data}\n"
 
 
 @app.get("/optimal", response_class=HTMLResponse)
 async def optimal_play(request: Request):
-    optimal = None
-    if game.round_active and game.current_hand:
-        optimal = get_optimal_play(game.current_hand, game.dealer_hand)
-    return templates.TemplateResponse(
-        "partials/optimal.html",
-        {"request": request, "optimal": optimal},
+    session_id, game = read_game(request)
+    etag = position_etag(game, "optimal")
+    if response := not_modified(request, session_id, etag):
+        return response
+    optimal = current_optimal(game)
+    return render(
+        request, "partials/optimal.html", session_id, game, etag, optimal=optimal
     )
 
 
 @app.get("/llm", response_class=HTMLResponse)
 async def llm_recommendation(request: Request):
+    session_id, game = read_game(request)
+    etag = position_etag(game, "llm:" + os.getenv("MODEL", ""))
+    if response := not_modified(request, session_id, etag):
+        return response
     recommendation = await get_recommendation(game)
-    return templates.TemplateResponse(
+    return render(
+        request,
         "partials/llm.html",
-        {"request": request, "recommendation": recommendation},
+        session_id,
+        game,
+        etag,
+        recommendation=recommendation,
+    )
+
+
+@app.get("/llm/stream")
+async def llm_stream(request: Request):
+    _, game = read_game(request)
+    optimal = current_optimal(game)
+
+    async def events():
+        context = {"request": request, "optimal": optimal}
+        yield sse_event(
+            "optimal", templates.get_template("partials/optimal.html").render(context)
+        )
+        recommendation = await get_recommendation(game)
+        yield sse_event(
+            "done",
+            templates.get_template("partials/recommendations.html").render(
+                context, recommendation=recommendation
+            ),
+        )
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
+
+
+@app.websocket("/ws")
+async def game_socket(
+    websocket: WebSocket, seed: int | None = None, rules: str = "house"
+):
+    try:
+        game = Game(seed=seed, rules=parse_rules(rules))
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+
+    await websocket.accept()
+    state = game_state(game)
+    await websocket.send_text(encode({"state": state}))
+    try:
+        while True:
+            action = parse_action(await websocket.receive_text())
+            if action not in legal_actions(game):
+                await websocket.send_text(
+                    encode({"error": f"Illegal action: {action}"})
+                )
+                continue
+            try:
+                ACTIONS[action](game)
+            except Exception as e:
+                await websocket.send_text(
+                    encode({"error": f"{action} failed: {type(e).__name__}: {e}"})
+                )
+                continue
+            new_state = game_state(game)
+            await websocket.send_text(encode({"diff": state_diff(state, new_state)}))
+            state = new_state
+    except WebSocketDisconnect:
+        pass
@@ -1,12 +1,36 @@
 import argparse
 import asyncio
 import csv
-from dataclasses import asdict, dataclass
-from typing import Awaitable, Callable
+import math
+import os
+import time
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+from typing import Awaitable, Callable, Self
 
 from blackjack import Game, HandResult
-from llm import get_recommendation
-from strategy import get_optimal_play
+from decision_cache import DEFAULT_CACHE_PATH, KEY_MODES, KeyMode
+from limiter import AdaptiveLimiter
+from llm import (
+    DecisionStats,
+    Recommendation,
+    configure_batcher,
+    configure_cache,
+    configure_limiter,
+    get_batch_recommendation,
+    get_batcher,
+    get_decision_cache,
+    get_limiter,
+    get_recommendation,
+    single_stats,
+)
+from results import convert_csv
+from rules import HOUSE_RULES, Rules, label_rules, parse_rules
+from strategy import decision_index, get_optimal_play
+from tracing import Tracer, configure_tracer, get_tracer, span
 
 
 @dataclass
@@ -22,26 +46,45 @@ class DecisionRecord:
     optimal_action: str
     result: str | None
     balance_change: float | None
+    latency_ms: float | None = None
+    input_tokens: int | None = None
+    output_tokens: int | None = None
+    retries: int | None = None
+    retry_error: str | None = None
 
 
-Strategy = Callable[[Game], Awaitable[str]]
+FIELDNAMES = [column.name for column in fields(DecisionRecord)]
 
+Strategy = Callable[[Game], Awaitable[Recommendation]]
 
-async def strategy_optimal(game: Game) -> str:
-    return get_optimal_play(game.current_hand, game.dealer_hand)
 
+async def strategy_optimal(game: Game) -> Recommendation:
+    return Recommendation(get_optimal_play(game.current_hand, game.dealer_hand))
 
-async def strategy_llm(game: Game) -> str:
-    rec = await get_recommendation(game)
-    return rec.decision if rec else "stand"
+
+async def strategy_llm(game: Game) -> Recommendation:
+    return await get_recommendation(game) or Recommendation("stand")
+
+
+async def strategy_llm_batch(game: Game) -> Recommendation:
+    return await get_batch_recommendation(game) or Recommendation("stand")
 
 
 STRATEGIES: dict[str, Strategy] = {
     "optimal": strategy_optimal,
     "llm": strategy_llm,
+    "llm_batch": strategy_llm_batch,
 }
 
 
+def run_labels(strategies: list[str], rule_specs: list[str]) -> list[str]:
+    return [
+        strategy if spec == "house" else f"{strategy}@{spec}"
+        for spec in rule_specs
+        for strategy in strategies
+    ]
+
+
 def validate_action(game: Game, action: str) -> str:
     hand = game.current_hand
     if not hand:
@@ -82,9 +125,11 @@ async def play_hand(
     hand_id: int,
     strategy_name: str,
     strategy_fn: Strategy,
+    rules: Rules = HOUSE_RULES,
 ) -> list[DecisionRecord]:
-    game = Game(seed=seed)
-    game.deal()
+    with span("deal", hand_id=hand_id):
+        game = Game(seed=seed, rules=rules)
+        game.deal()
 
     records: list[DecisionRecord] = []
     decision_num = 0
@@ -95,31 +140,37 @@ async def play_hand(
         dealer_upcard = str(game.dealer_hand.cards[0])
 
         optimal = get_optimal_play(game.current_hand, game.dealer_hand)
-        action = await strategy_fn(game)
-        action = validate_action(game, action)
-
-        records.append(
-            DecisionRecord(
-                hand_id=hand_id,
-                seed=seed,
-                strategy=strategy_name,
-                decision_num=decision_num,
-                player_cards=player_cards,
-                player_value=player_value,
-                dealer_upcard=dealer_upcard,
-                action=action,
-                optimal_action=optimal,
-                result=None,
-                balance_change=None,
-            )
+        with span("strategy", strategy=strategy_name, decision=decision_num):
+            recommendation = await strategy_fn(game)
+        action = validate_action(game, recommendation.decision)
+
+        record = DecisionRecord(
+            hand_id=hand_id,
+            seed=seed,
+            strategy=strategy_name,
+            decision_num=decision_num,
+            player_cards=player_cards,
+            player_value=player_value,
+            dealer_upcard=dealer_upcard,
+            action=action,
+            optimal_action=optimal,
+            result=None,
+            balance_change=None,
         )
+        if metrics := recommendation.metrics:
+            record.latency_ms = round(metrics.latency * 1000, 3)
+            record.input_tokens = metrics.input_tokens
+            record.output_tokens = metrics.output_tokens
+            record.retries = metrics.retries
+            record.retry_error = metrics.retry_error or None
+        records.append(record)
 
         execute_action(game, action)
         decision_num += 1
 
     if game.round_results:
         total_balance = sum(
-            get_balance_change(result) * (2.0 if hand.is_doubled else 1.0)
+            get_balance_change(result, rules) * (2.0 if hand.is_doubled else 1.0)
             for hand, result in game.round_results
         )
         result_str = ", ".join(r.value for _, r in game.round_results)
@@ -147,7 +198,7 @@ async def play_hand(
     return records
 
 
-def get_balance_change(result: HandResult) -> float:
+def get_balance_change(result: HandResult, rules: Rules = HOUSE_RULES) -> float:
     match result:
         case HandResult.WIN:
             return 1.0
@@ -156,50 +207,432 @@ def get_balance_change(result: HandResult) -> float:
         case HandResult.PUSH:
             return 0.0
         case HandResult.BLACKJACK:
-            return 1.5
+            return rules.blackjack_payout
         case HandResult.SURRENDER:
             return -0.5
     return 0.0
 
 
+@dataclass
+class StrategySummary:
+    hands: int = 0
+    balance: float = 0.0
+    decisions: int = 0
+    optimal_matches: int = 0
+    latencies: list[float] = field(default_factory=list)
+    input_tokens: int = 0
+    output_tokens: int = 0
+    retries: int = 0
+    errors: Counter[str] = field(default_factory=Counter)
+
+
+class BenchmarkSummary:
+    def __init__(self):
+        self.strategies: dict[str, StrategySummary] = {}
+        self.elapsed = 0.0
+
+    def add(self, records: Iterable[DecisionRecord]):
+        for record in records:
+            summary = self.strategies.get(record.strategy)
+            if summary is None:
+                summary = self.strategies[record.strategy] = StrategySummary()
+            summary.decisions += 1
+            if record.action == record.optimal_action:
+                summary.optimal_matches += 1
+            if record.balance_change is not None:
+                summary.hands += 1
+                summary.balance += record.balance_change
+            if record.latency_ms is not None:
+                summary.latencies.append(record.latency_ms)
+                summary.input_tokens += record.input_tokens or 0
+                summary.output_tokens += record.output_tokens or 0
+                summary.retries += record.retries or 0
+            if record.retry_error:
+                summary.errors[record.retry_error] += 1
+
+
+HandSink = Callable[[list[DecisionRecord]], None]
+
+FSYNC_INTERVAL = 5.0
+
+
+class ReorderBuffer:
+    def __init__(self, sink: HandSink, capacity: int):
+        self.sink = sink
+        self.capacity = capacity
+        self.next_seq = 0
+        self.pending: dict[int, list[DecisionRecord]] = {}
+        self.advanced = asyncio.Condition()
+
+    async def reserve(self, seq: int):
+        async with self.advanced:
+            await self.advanced.wait_for(lambda: seq < self.next_seq + self.capacity)
+
+    async def put(self, seq: int, records: list[DecisionRecord]):
+        self.pending[seq] = records
+        if seq != self.next_seq:
+            return
+        while self.next_seq in self.pending:
+            self.sink(self.pending.pop(self.next_seq))
+            self.next_seq += 1
+        async with self.advanced:
+            self.advanced.notify_all()
+
+
 async def run_benchmark(
     num_hands: int,
     strategies: list[str],
     start: int = 0,
     concurrency: int = 5,
-    csv_writer=None,
-    write_lock=None,
-) -> list[DecisionRecord]:
-    semaphore = asyncio.Semaphore(concurrency)
+    on_hand: HandSink | None = None,
+    progress: bool = True,
+    skip: set[tuple[int, str]] | None = None,
+) -> BenchmarkSummary:
+    summary = BenchmarkSummary()
+    started = time.perf_counter()
     completed = 0
-    all_records: list[DecisionRecord] = []
+    skip = skip or set()
+    total = num_hands - count_skipped_hands(skip, strategies, start, num_hands)
+
+    def emit(records: list[DecisionRecord]):
+        summary.add(records)
+        if on_hand:
+            on_hand(records)
+
+    buffer = ReorderBuffer(emit, capacity=concurrency * 4)
+    hand_ids = enumerate(
+        hand_id
+        for hand_id in range(start, start + num_hands)
+        if any((hand_id, strategy) not in skip for strategy in strategies)
+    )
 
     async def play_all_strategies_for_hand(hand_id: int) -> list[DecisionRecord]:
+        hand_records: list[DecisionRecord] = []
+        for strategy_name in strategies:
+            if (hand_id, strategy_name) in skip:
+                continue
+            strategy_fn = STRATEGIES[strategy_name.partition("@")[0]]
+            with span("play_hand", hand_id=hand_id, strategy=strategy_name):
+                records = await play_hand(
+                    hand_id,
+                    hand_id,
+                    strategy_name,
+                    strategy_fn,
+                    label_rules(strategy_name),
+                )
+            hand_records.extend(records)
+        return hand_records
+
+    async def worker():
         nonlocal completed
-        async with semaphore:
-            hand_records: list[DecisionRecord] = []
-            for strategy_name in strategies:
-                strategy_fn = STRATEGIES[strategy_name]
-                records = await play_hand(hand_id, hand_id, strategy_name, strategy_fn)
-                hand_records.extend(records)
-
-            if csv_writer and write_lock:
-                async with write_lock:
-                    for record in hand_records:
-                        csv_writer.writerow(asdict(record))
-
-            all_records.extend(hand_records)
+        for seq, hand_id in hand_ids:
+            with span("reserve", seq=seq):
+                await buffer.reserve(seq)
+            with span("hand", hand_id=hand_id):
+                records = await play_all_strategies_for_hand(hand_id)
+            await buffer.put(seq, records)
             completed += 1
-            print(f"Completed hand {completed}/{num_hands}")
-            return hand_records
+            if progress:
+                print_progress(completed, total)
 
-    tasks = [
-        play_all_strategies_for_hand(hand_id)
-        for hand_id in range(start, start + num_hands)
+    tasks = [asyncio.create_task(worker()) for _ in range(min(concurrency, total))]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    summary.elapsed = time.perf_counter() - started
+    return summary
+
+
+def print_progress(completed: int, total: int):
+    limiter = get_limiter()
+    if limiter:
+        print(
+            f"Completed hand {completed}/{total} "
+            f"(limit {limiter.current_limit}, in flight {limiter.in_flight}, "
+            f"{limiter.requests_per_second:.1f} req/s)"
+        )
+    else:
+        print(f"Completed hand {completed}/{total}")
+
+
+@dataclass
+class WorkerConfig:
+    cache_path: str | None = DEFAULT_CACHE_PATH
+    cache_key: KeyMode = "prompt"
+    adaptive_limits: tuple[int, int] | None = None
+    batch_size: int = 10
+    batch_wait: float = 0.05
+    trace: bool = False
+
+    @classmethod
+    def capture(cls) -> Self:
+        cache = get_decision_cache()
+        limiter = get_limiter()
+        batcher = get_batcher()
+        return cls(
+            cache_path=cache.path if cache else None,
+            cache_key=cache.key_mode if cache else "prompt",
+            adaptive_limits=(
+                (limiter.current_limit, limiter.max_limit) if limiter else None
+            ),
+            batch_size=batcher.batch_size,
+            batch_wait=batcher.max_wait,
+            trace=get_tracer() is not None,
+        )
+
+    def apply(self):
+        configure_cache(self.cache_path, self.cache_key)
+        configure_batcher(self.batch_size, self.batch_wait)
+        single_stats.reset()
+        if not self.trace:
+            configure_tracer(None)
+        elif get_tracer() is None:
+            configure_tracer(Tracer("shard worker"))
+        if self.adaptive_limits:
+            initial, max_limit = self.adaptive_limits
+            configure_limiter(AdaptiveLimiter(initial, max_limit=max_limit))
+        else:
+            configure_limiter(None)
+
+
+def prepare_charts(strategies: list[str]):
+    for label in strategies:
+        decision_index(label_rules(label))
+
+
+def run_shard(
+    start: int,
+    num_hands: int,
+    strategies: list[str],
+    concurrency: int,
+    config: WorkerConfig,
+    skip: set[tuple[int, str]] | None = None,
+) -> tuple[list[DecisionRecord], dict[str, int], dict[str, DecisionStats], list[dict]]:
+    config.apply()
+    prepare_charts(strategies)
+    records: list[DecisionRecord] = []
+    asyncio.run(
+        run_benchmark(
+            num_hands,
+            strategies,
+            start,
+            concurrency,
+            on_hand=records.extend,
+            progress=False,
+            skip=skip,
+        )
+    )
+    cache = get_decision_cache()
+    decision_stats = {"llm": single_stats, "llm_batch": get_batcher().stats}
+    tracer = get_tracer()
+    events = tracer.drain() if tracer else []
+    return records, cache.stats if cache else {}, decision_stats, events
+
+
+async def run_benchmark_sharded(
+    num_hands: int,
+    strategies: list[str],
+    start: int = 0,
+    concurrency: int = 5,
+    workers: int = 2,
+    on_hand: HandSink | None = None,
+    skip: set[tuple[int, str]] | None = None,
+) -> BenchmarkSummary:
+    cache = get_decision_cache()
+    config = WorkerConfig.capture()
+
+    chunk_size = max(1, min(500, math.ceil(num_hands / (workers * 8))))
+    shards = [
+        (shard_start, min(chunk_size, start + num_hands - shard_start))
+        for shard_start in range(start, start + num_hands, chunk_size)
     ]
-    await asyncio.gather(*tasks)
+    shard_skips: list[set[tuple[int, str]]] = [set() for _ in shards]
+    for hand_id, strategy in skip or ():
+        if start <= hand_id < start + num_hands:
+            shard_skips[(hand_id - start) // chunk_size].add((hand_id, strategy))
+
+    shard_played = [
+        shard_hands
+        - count_skipped_hands(shard_skip, strategies, shard_start, shard_hands)
+        for (shard_start, shard_hands), shard_skip in zip(shards, shard_skips)
+    ]
+    total = sum(shard_played)
 
-    return all_records
+    summary = BenchmarkSummary()
+    started = time.perf_counter()
+    completed = 0
+
+    def emit(records: list[DecisionRecord]):
+        summary.add(records)
+        if on_hand:
+            for hand_records in group_by_hand(records):
+                on_hand(hand_records)
+
+    buffer = ReorderBuffer(emit, capacity=workers * 2)
+    loop = asyncio.get_running_loop()
+
+    shard_ids = iter(range(len(shards)))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+
+        async def worker():
+            nonlocal completed
+            for seq in shard_ids:
+                with span("reserve", seq=seq):
+                    await buffer.reserve(seq)
+                shard_start, shard_hands = shards[seq]
+                with span("shard", start=shard_start, hands=shard_hands):
+                    (
+                        records,
+                        cache_stats,
+                        decision_stats,
+                        events,
+                    ) = await loop.run_in_executor(
+                        pool,
+                        run_shard,
+                        shard_start,
+                        shard_hands,
+                        strategies,
+                        concurrency,
+                        config,
+                        shard_skips[seq],
+                    )
+                if tracer := get_tracer():
+                    tracer.extend(events)
+                if cache:
+                    cache.hits += cache_stats["hits"]
+                    cache.misses += cache_stats["misses"]
+                single_stats.add(decision_stats["llm"])
+                get_batcher().stats.add(decision_stats["llm_batch"])
+                await buffer.put(seq, records)
+                if shard_played[seq]:
+                    completed += shard_played[seq]
+                    print(f"Completed hand {completed}/{total}")
+
+        tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    summary.elapsed = time.perf_counter() - started
+    return summary
+
+
+def count_skipped_hands(
+    skip: set[tuple[int, str]], strategies: list[str], start: int, num_hands: int
+) -> int:
+    hand_ids = {hand_id for hand_id, _ in skip if start <= hand_id < start + num_hands}
+    return sum(
+        1
+        for hand_id in hand_ids
+        if all((hand_id, strategy) in skip for strategy in strategies)
+    )
+
+
+def read_header(path: str) -> list[str]:
+    with open(path, newline="") as f:
+        return next(csv.reader(f), [])
+
+
+def truncate_partial_line(path: str, chunk_size: int = 1 << 16) -> int:
+    with open(path, "r+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        keep = 0
+        position = size
+        while position > 0:
+            start = max(0, position - chunk_size)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b"\n")
+            if newline != -1:
+                keep = start + newline + 1
+                break
+            position = start
+        if keep < size:
+            f.truncate(keep)
+            sync(f)
+        return size - keep
+
+
+def load_completed(path: str) -> set[tuple[int, str]]:
+    if not os.path.exists(path):
+        return set()
+    if dropped := truncate_partial_line(path):
+        print(f"Dropped {dropped} bytes of a partially written row")
+
+    completed: set[tuple[int, str]] = set()
+    rows_per_pair: Counter[tuple[int, str]] = Counter()
+
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            pair = (int(row["hand_id"]), row["strategy"])
+            rows_per_pair[pair] += 1
+            if row["result"]:
+                completed.add(pair)
+        fieldnames = reader.fieldnames or []
+
+    total_rows = rows_per_pair.total()
+    kept_rows = sum(rows_per_pair[pair] for pair in completed)
+    if kept_rows != total_rows:
+        tmp_path = f"{path}.tmp"
+        with open(path, newline="") as src, open(tmp_path, "w", newline="") as dst:
+            writer = csv.DictWriter(dst, fieldnames=fieldnames)
+            writer.writeheader()
+            for row in csv.DictReader(src):
+                if (int(row["hand_id"]), row["strategy"]) in completed:
+                    writer.writerow(row)
+            sync(dst)
+        os.replace(tmp_path, path)
+        print(f"Dropped {total_rows - kept_rows} rows from incomplete hands")
+
+    return completed
+
+
+def optional(kind: type, value: str | None):
+    return kind(value) if value else None
+
+
+def read_records(path: str) -> Iterator[DecisionRecord]:
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            yield DecisionRecord(
+                hand_id=int(row["hand_id"]),
+                seed=int(row["seed"]),
+                strategy=row["strategy"],
+                decision_num=int(row["decision_num"]),
+                player_cards=row["player_cards"],
+                player_value=int(row["player_value"]),
+                dealer_upcard=row["dealer_upcard"],
+                action=row["action"],
+                optimal_action=row["optimal_action"],
+                result=row["result"] or None,
+                balance_change=optional(float, row["balance_change"]),
+                latency_ms=optional(float, row.get("latency_ms")),
+                input_tokens=optional(int, row.get("input_tokens")),
+                output_tokens=optional(int, row.get("output_tokens")),
+                retries=optional(int, row.get("retries")),
+                retry_error=row.get("retry_error") or None,
+            )
+
+
+def sync(f):
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def group_by_hand(records: list[DecisionRecord]) -> list[list[DecisionRecord]]:
+    groups: list[list[DecisionRecord]] = []
+    for record in records:
+        if groups and groups[-1][0].hand_id == record.hand_id:
+            groups[-1].append(record)
+        else:
+            groups.append([record])
+    return groups
 
 
 def save_to_csv(records: list[DecisionRecord], filename: str):
@@ -215,32 +648,87 @@ def save_to_csv(records: list[DecisionRecord], filename: str):
             writer.writerow(asdict(record))
 
 
-def print_summary(records: list[DecisionRecord]):
-    strategies = set(r.strategy for r in records)
+def percentile(values: list[float], q: float) -> float:
+    index = min(len(values) - 1, max(0, math.ceil(q * len(values)) - 1))
+    return values[index]
+
+
+def print_latency(stats: StrategySummary):
+    latencies = sorted(stats.latencies)
+    calls = len(latencies)
+    print(
+        f"  Model latency: p50 {percentile(latencies, 0.50):.0f} ms, "
+        f"p95 {percentile(latencies, 0.95):.0f} ms, "
+        f"p99 {percentile(latencies, 0.99):.0f} ms ({calls} uncached decisions)"
+    )
+    print(
+        f"  Tokens: {stats.input_tokens} in, {stats.output_tokens} out "
+        f"({(stats.input_tokens + stats.output_tokens) / calls:.0f}/decision)"
+    )
+    errors = ", ".join(f"{name} x{count}" for name, count in stats.errors.most_common())
+    print(f"  Retries: {stats.retries}" + (f" ({errors})" if errors else ""))
+
 
+def print_summary(summary: BenchmarkSummary, run: BenchmarkSummary | None = None):
+    run = run or summary
     print("\n" + "=" * 50)
     print("BENCHMARK SUMMARY")
     print("=" * 50)
 
-    for strategy in sorted(strategies):
-        strategy_records = [r for r in records if r.strategy == strategy]
-        final_records = [r for r in strategy_records if r.balance_change is not None]
-
-        total_balance = sum(r.balance_change for r in final_records)
-        num_hands = len(final_records)
-
-        optimal_matches = sum(
-            1 for r in strategy_records if r.action == r.optimal_action
+    for strategy, stats in sorted(summary.strategies.items()):
+        num_hands = stats.hands
+        total_balance = stats.balance
+        accuracy = (
+            (stats.optimal_matches / stats.decisions * 100) if stats.decisions else 0
         )
-        total_decisions = len(strategy_records)
-        accuracy = (optimal_matches / total_decisions * 100) if total_decisions else 0
 
         print(f"\n{strategy.upper()}")
         print(f"  Hands played: {num_hands}")
         print(f"  Total balance: {total_balance:+.2f}")
         print(f"  Avg per hand: {total_balance / num_hands:+.4f}" if num_hands else "")
         print(
-            f"  Decision accuracy: {accuracy:.1f}% ({optimal_matches}/{total_decisions})"
+            f"  Decision accuracy: {accuracy:.1f}% "
+            f"({stats.optimal_matches}/{stats.decisions})"
+        )
+        if stats.latencies:
+            print_latency(stats)
+
+    if run.elapsed and run.strategies:
+        hands = sum(stats.hands for stats in run.strategies.values())
+        decisions = sum(stats.decisions for stats in run.strategies.values())
+        print(
+            f"\nThroughput: {hands / run.elapsed:,.1f} hands/s, "
+            f"{decisions / run.elapsed:,.1f} decisions/s "
+            f"over {run.elapsed:.1f}s"
+        )
+
+    for strategy, stats in (
+        ("llm", single_stats),
+        ("llm_batch", get_batcher().stats),
+    ):
+        if stats.requests:
+            print(
+                f"\n{strategy} model calls: {stats.requests} requests for "
+                f"{stats.decisions} decisions "
+                f"({stats.decisions_per_request:.2f} decisions/request, "
+                f"{stats.latency_per_decision * 1000:.1f} ms/decision, "
+                f"{stats.fallbacks} batch fallbacks)"
+            )
+
+    cache = get_decision_cache()
+    if cache and cache.hits + cache.misses:
+        hit_rate = cache.hits / (cache.hits + cache.misses) * 100
+        print(
+            f"\nLLM cache: {cache.hits} hits, {cache.misses} misses "
+            f"({hit_rate:.1f}% hit rate)"
+        )
+
+    limiter = get_limiter()
+    if limiter:
+        print(
+            f"Adaptive concurrency: final limit {limiter.current_limit}, "
+            f"{limiter.successes} calls, {limiter.rate_limited} rate limited, "
+            f"{limiter.errors} errors"
         )
 
 
@@ -258,6 +746,13 @@ async def main():
         choices=list(STRATEGIES.keys()),
         help="Strategies to benchmark",
     )
+    parser.add_argument(
+        "-r",
+        "--rules",
+        nargs="+",
+        default=["house"],
+        help="Rule sets to play each strategy under, e.g. house h17,num_decks=2",
+    )
     parser.add_argument(
         "-o",
         "--output",
@@ -270,66 +765,166 @@ async def main():
         "--concurrency",
         type=int,
         default=5,
-        help="Number of concurrent hands to process",
+        help="Number of concurrent hands to process (per worker)",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes to shard hands across",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the model (e.g. to measure sampling variance)",
+    )
+    parser.add_argument(
+        "--cache-path",
+        type=str,
+        default=DEFAULT_CACHE_PATH,
+        help="SQLite file for cached LLM decisions",
+    )
+    parser.add_argument(
+        "--cache-key",
+        choices=KEY_MODES,
+        default="prompt",
+        help="Cache key: exact prompt, or suit-agnostic canonical state",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip hands already completed in the output file and append the rest",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Adapt in-flight model calls (AIMD), starting from -c",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=64,
+        help="Upper bound on in-flight model calls with --adaptive",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=10,
+        help="Maximum positions per model call for the llm_batch strategy",
+    )
+    parser.add_argument(
+        "--batch-wait",
+        type=float,
+        default=0.05,
+        help="Seconds to wait for a batch to fill before sending it",
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="Also write a compressed columnar .npz copy of the output for the dashboard",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        help="Write a Chrome trace-event JSON of the run (open in Perfetto)",
     )
     args = parser.parse_args()
+    for spec in args.rules:
+        try:
+            parse_rules(spec)
+        except ValueError as e:
+            parser.error(str(e))
+    strategies = run_labels(args.strategies, args.rules)
+
+    configure_cache(None if args.no_cache else args.cache_path, args.cache_key)
+    configure_batcher(args.batch_size, args.batch_wait)
+    configure_tracer(Tracer() if args.trace else None)
+    concurrency = args.concurrency
+    if args.adaptive:
+        configure_limiter(
+            AdaptiveLimiter(args.concurrency, max_limit=args.max_concurrency)
+        )
+        concurrency = args.max_concurrency
 
     print(f"Running benchmark with {args.num_hands} hands (starting at {args.start})")
-    print(f"Strategies: {', '.join(args.strategies)}")
+    print(f"Strategies: {', '.join(strategies)}")
     print()
+    prepare_charts(strategies)
 
-    fieldnames = [
-        "hand_id",
-        "seed",
-        "strategy",
-        "decision_num",
-        "player_cards",
-        "player_value",
-        "dealer_upcard",
-        "action",
-        "optimal_action",
-        "result",
-        "balance_change",
-    ]
+    fieldnames = FIELDNAMES
 
-    records: list[DecisionRecord] = []
+    summary: BenchmarkSummary | None = None
 
-    with open(args.output, "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        write_lock = asyncio.Lock()
+    skip: set[tuple[int, str]] = set()
+    append = args.resume and os.path.exists(args.output)
+    if append:
+        skip = load_completed(args.output)
+        fieldnames = read_header(args.output) or FIELDNAMES
+        print(f"Resuming: {len(skip)} completed (hand, strategy) pairs found")
+
+    with open(args.output, "a" if append else "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+        if f.tell() == 0:
+            writer.writeheader()
+        last_sync = time.monotonic()
+
+        def write_hand(records: list[DecisionRecord]):
+            nonlocal last_sync
+            with span("write", rows=len(records)):
+                writer.writerows(asdict(record) for record in records)
+                if time.monotonic() - last_sync >= FSYNC_INTERVAL:
+                    sync(f)
+                    last_sync = time.monotonic()
 
         try:
-            records = await run_benchmark(
-                args.num_hands,
-                args.strategies,
-                args.start,
-                args.concurrency,
-                csv_writer=writer,
-                write_lock=write_lock,
-            )
+            if args.workers > 1:
+                summary = await run_benchmark_sharded(
+                    args.num_hands,
+                    strategies,
+                    args.start,
+                    concurrency,
+                    args.workers,
+                    on_hand=write_hand,
+                    skip=skip,
+                )
+            else:
+                summary = await run_benchmark(
+                    args.num_hands,
+                    strategies,
+                    args.start,
+                    concurrency,
+                    on_hand=write_hand,
+                    skip=skip,
+                )
             print(f"\nResults saved to {args.output}")
         except KeyboardInterrupt:
             print("\n\nBenchmark interrupted by user.")
             print(f"Partial results saved to {args.output}")
         except Exception as e:
             print(f"\n\nBenchmark error: {e}")
-            print(f"Partial results saved to {args.output}")
-
-    if records:
-        with open(args.output, "r") as f:
-            reader = csv.DictReader(f)
-            rows = list(reader)
-
-        rows.sort(key=lambda x: (int(x["hand_id"]), int(x["decision_num"])))
-
-        with open(args.output, "w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(rows)
-
-        print(f"Results sorted by hand_id in {args.output}")
-        print_summary(records)
+            print(f"Partial results saved to {args.output} (continue with --resume)")
+        finally:
+            sync(f)
+
+    if args.columnar:
+        print(f"Columnar copy saved to {convert_csv(Path(args.output))}")
+
+    if tracer := get_tracer():
+        tracer.save(args.trace)
+        print(f"Trace saved to {args.trace} ({len(tracer.events)} events)")
+
+    if append:
+        totals = BenchmarkSummary()
+        totals.add(read_records(args.output))
+        summary = summary or BenchmarkSummary()
+        if totals.strategies:
+            print(f"\nTotals include the hands already in {args.output}")
+            print_summary(totals, summary)
+        else:
+            print("\nNo results collected.")
+    elif summary and summary.strategies:
+        print_summary(summary)
     else:
         print("\nNo results collected.")
 
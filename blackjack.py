@@ -1,6 +1,11 @@
 import random
-from dataclasses import dataclass, field
+from array import array
+from dataclasses import dataclass, field, replace
 from enum import Enum
+from functools import lru_cache
+from typing import Self
+
+from rules import HOUSE_RULES, Rules
 
 
 class Suit(Enum):
@@ -47,10 +52,15 @@ class Card:
         return self.rank.points
 
 
+def reshuffle_seed(seed: int, shuffles: int) -> int | str:
+    return seed if shuffles == 0 else f"{seed}/{shuffles}"
+
+
 class Shoe:
     def __init__(self, num_decks: int = 6, seed: int | None = None):
         self.num_decks = num_decks
         self.seed = seed
+        self.shuffles = 0
         self.cards: list[Card] = []
         self.reshuffle()
 
@@ -62,9 +72,10 @@ class Shoe:
             for rank in Rank
         ]
         if self.seed is not None:
-            random.Random(self.seed).shuffle(self.cards)
+            random.Random(reshuffle_seed(self.seed, self.shuffles)).shuffle(self.cards)
         else:
             random.shuffle(self.cards)
+        self.shuffles += 1
 
     def draw(self) -> Card:
         if len(self.cards) < 20:
@@ -72,25 +83,96 @@ class Shoe:
         return self.cards.pop()
 
 
-@dataclass
+CARD_TABLE: tuple[Card, ...] = tuple(Card(rank, suit) for suit in Suit for rank in Rank)
+
+CARDS_BY_LABEL = {str(card): card for card in CARD_TABLE}
+
+DECK_CODES = bytes(range(len(CARD_TABLE)))
+
+
+@lru_cache(maxsize=1024)
+def shuffled_codes(num_decks: int, seed: int) -> bytes:
+    codes = array("B", DECK_CODES * num_decks)
+    random.Random(seed).shuffle(codes)
+    return codes.tobytes()
+
+
+class EncodedShoe:
+    def __init__(self, num_decks: int = 6, seed: int | None = None):
+        self.num_decks = num_decks
+        self.seed = seed
+        self.shuffles = 0
+        self.codes = array("B")
+        self.reshuffle()
+
+    @property
+    def cards(self) -> list[Card]:
+        return [CARD_TABLE[code] for code in self.codes]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def reshuffle(self):
+        if self.seed is not None and self.shuffles == 0:
+            self.codes = array("B", shuffled_codes(self.num_decks, self.seed))
+        else:
+            self.codes = array("B", DECK_CODES * self.num_decks)
+            if self.seed is not None:
+                seed = reshuffle_seed(self.seed, self.shuffles)
+                random.Random(seed).shuffle(self.codes)
+            else:
+                random.shuffle(self.codes)
+        self.shuffles += 1
+
+    def draw(self) -> Card:
+        if len(self.codes) < 20:
+            self.reshuffle()
+        return CARD_TABLE[self.codes.pop()]
+
+
+@dataclass(slots=True)
 class Hand:
     cards: list[Card] = field(default_factory=list)
     is_split: bool = False
     is_doubled: bool = False
     is_standing: bool = False
     is_surrendered: bool = False
+    rules: Rules = field(default=HOUSE_RULES, repr=False)
+    can_resplit: bool = field(default=False, repr=False)
+    hard_total: int = field(default=0, init=False, repr=False)
+    aces: int = field(default=0, init=False, repr=False)
+
+    def __post_init__(self):
+        self.aces = sum(1 for card in self.cards if card.rank == Rank.ACE)
+        self.hard_total = sum(card.value for card in self.cards) - 10 * self.aces
 
     def add_card(self, card: Card):
         self.cards.append(card)
+        if card.rank == Rank.ACE:
+            self.hard_total += 1
+            self.aces += 1
+        else:
+            self.hard_total += card.value
+
+    def split(self) -> Self:
+        card = self.cards.pop()
+        if card.rank == Rank.ACE:
+            self.hard_total -= 1
+            self.aces -= 1
+        else:
+            self.hard_total -= card.value
+        self.is_split = True
+        return type(self)(cards=[card], is_split=True, rules=self.rules)
+
+    @property
+    def is_soft(self) -> bool:
+        return self.aces > 0 and self.hard_total <= 11
 
     @property
     def value(self) -> int:
-        total = sum(card.value for card in self.cards)
-        aces = sum(1 for card in self.cards if card.rank == Rank.ACE)
-        while total > 21 and aces:
-            total -= 10
-            aces -= 1
-        return total
+        if self.aces and self.hard_total <= 11:
+            return self.hard_total + 10
+        return self.hard_total
 
     @property
     def is_blackjack(self) -> bool:
@@ -106,17 +188,19 @@ class Hand:
 
     @property
     def can_split(self) -> bool:
-        if len(self.cards) != 2 or self.is_split:
+        if len(self.cards) != 2 or (self.is_split and not self.can_resplit):
             return False
         return self.cards[0].value == self.cards[1].value
 
     @property
     def can_double(self) -> bool:
+        if self.is_split and not self.rules.double_after_split:
+            return False
         return len(self.cards) == 2 and not self.is_doubled
 
     @property
     def can_surrender(self) -> bool:
-        return len(self.cards) == 2 and not self.is_split
+        return self.rules.surrender and len(self.cards) == 2 and not self.is_split
 
     @property
     def is_done(self) -> bool:
@@ -147,10 +231,20 @@ class GameStats:
 
 
 class Game:
-    def __init__(self, num_decks: int = 6, seed: int | None = None):
-        self.shoe = Shoe(num_decks, seed=seed)
+    def __init__(
+        self,
+        num_decks: int | None = None,
+        seed: int | None = None,
+        *,
+        rules: Rules = HOUSE_RULES,
+        shoe_cls: type[Shoe | EncodedShoe] = EncodedShoe,
+    ):
+        if num_decks is not None:
+            rules = replace(rules, num_decks=num_decks)
+        self.rules = rules
+        self.shoe = shoe_cls(rules.num_decks, seed=seed)
         self.player_hands: list[Hand] = []
-        self.dealer_hand: Hand = Hand()
+        self.dealer_hand: Hand = Hand(rules=rules)
         self.current_hand_index: int = 0
         self.stats = GameStats()
         self.round_results: list[tuple[Hand, HandResult]] = []
@@ -163,8 +257,8 @@ class Game:
         return None
 
     def deal(self):
-        self.player_hands = [Hand()]
-        self.dealer_hand = Hand()
+        self.player_hands = [Hand(rules=self.rules)]
+        self.dealer_hand = Hand(rules=self.rules)
         self.current_hand_index = 0
         self.round_results = []
         self.round_active = True
@@ -174,7 +268,9 @@ class Game:
         self.player_hands[0].add_card(self.shoe.draw())
         self.dealer_hand.add_card(self.shoe.draw())
 
-        if self.dealer_hand.is_blackjack or self.player_hands[0].is_blackjack:
+        if self.player_hands[0].is_blackjack or (
+            self.rules.peek and self.dealer_hand.is_blackjack
+        ):
             self._finish_round()
 
     def hit(self):
@@ -201,12 +297,13 @@ class Game:
         hand = self.current_hand
         if hand and hand.can_split:
             is_aces = hand.cards[0].rank == Rank.ACE
-            card = hand.cards.pop()
-            hand.is_split = True
-            new_hand = Hand(cards=[card], is_split=True)
+            new_hand = hand.split()
             hand.add_card(self.shoe.draw())
             new_hand.add_card(self.shoe.draw())
             self.player_hands.insert(self.current_hand_index + 1, new_hand)
+            can_resplit = len(self.player_hands) < self.rules.max_split_hands
+            for split_hand in self.player_hands:
+                split_hand.can_resplit = can_resplit
             if is_aces:
                 self.current_hand_index = len(self.player_hands)
                 self._finish_round()
@@ -225,8 +322,11 @@ class Game:
     def _finish_round(self):
         self.round_active = False
 
-        while self.dealer_hand.value < 17:
-            self.dealer_hand.add_card(self.shoe.draw())
+        dealer = self.dealer_hand
+        while dealer.value < 17 or (
+            self.rules.hits_soft_17 and dealer.value == 17 and dealer.is_soft
+        ):
+            dealer.add_card(self.shoe.draw())
 
         for hand in self.player_hands:
             result = self._determine_result(hand)
@@ -263,6 +363,6 @@ class Game:
             case HandResult.PUSH:
                 pass
             case HandResult.BLACKJACK:
-                self.stats.balance += 1.5
+                self.stats.balance += self.rules.blackjack_payout
             case HandResult.SURRENDER:
                 self.stats.balance -= 0.5
@@ -0,0 +1,201 @@
+import argparse
+import json
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+from blackjack import CARDS_BY_LABEL
+from dealer import ACE, DECK, Composition, remove, shoe_composition
+from ev import get_analyzer
+from rules import HOUSE_RULES, Rules, parse_rules
+
+CHART_CACHE_DIR = Path(".strategy_cache")
+
+ACTION_CODES = {
+    "stand": "S",
+    "hit": "H",
+    "double": "D",
+    "split": "P",
+    "surrender": "R",
+}
+
+UPCARDS = (1, 2, 3, 4, 5, 6, 7, 8, 9, ACE)
+
+HARD_TOTALS = range(4, 21)
+
+SOFT_TOTALS = range(12, 21)
+
+DecisionKey = tuple[str, int, int, bool, bool]
+
+
+def starting_hands(kind: str, total: int) -> list[tuple[int, int]]:
+    if kind == "pair":
+        return [(total, total)]
+    if kind == "soft":
+        return [(ACE, total - 12)]
+    return [
+        (first, second)
+        for first in range(1, 10)
+        for second in range(first, 10)
+        if first + second + 2 == total
+    ]
+
+
+def hand_probability(comp: Composition, cards: tuple[int, int]) -> float:
+    first, second = cards
+    remaining = sum(comp)
+    p = comp[first] / remaining * remove(comp, first)[second] / (remaining - 1)
+    return p if first == second else 2 * p
+
+
+def average_evs(
+    kind: str, total: int, upcard: int, rules: Rules, shoe: Composition | None
+) -> dict[str, float]:
+    infinite = shoe is None
+    shoe = DECK if shoe is None else remove(shoe, upcard)
+    totals: dict[str, float] = {}
+    weight = 0.0
+    for cards in starting_hands(kind, total):
+        comp = shoe if infinite else remove(remove(shoe, cards[0]), cards[1])
+        p = hand_probability(shoe, cards)
+        analyzer = get_analyzer(upcard, comp, not infinite, rules)
+        evs = analyzer.action_evs(list(cards))
+        if kind != "pair":
+            evs.pop("split", None)
+        for action, ev in evs.items():
+            totals[action] = totals.get(action, 0.0) + p * ev
+        weight += p
+    return {action: ev / weight for action, ev in totals.items()}
+
+
+def best_action(evs: dict[str, float], can_double: bool, can_surrender: bool) -> str:
+    allowed = {
+        action: ev
+        for action, ev in evs.items()
+        if (action != "double" or can_double)
+        and (action != "surrender" or can_surrender)
+    }
+    return max(allowed, key=allowed.__getitem__)
+
+
+def generate_index(
+    rules: Rules = HOUSE_RULES,
+    infinite: bool = False,
+    shoe: Composition | None = None,
+) -> dict[DecisionKey, str]:
+    if not infinite and shoe is None:
+        shoe = shoe_composition(rules.num_decks)
+    rows = [
+        *(("pair", total) for total in range(10)),
+        *(("soft", total) for total in SOFT_TOTALS),
+        *(("hard", total) for total in HARD_TOTALS),
+    ]
+    index: dict[DecisionKey, str] = {}
+    for dealer_idx, upcard in enumerate(UPCARDS):
+        for kind, total in rows:
+            evs = average_evs(kind, total, upcard, rules, shoe)
+            key_total = total
+            if kind == "pair":
+                key_total = 11 if total == ACE else total + 1
+            for can_double in (False, True):
+                for can_surrender in (False, True):
+                    index[kind, key_total, dealer_idx, can_double, can_surrender] = (
+                        best_action(evs, can_double, can_surrender)
+                    )
+
+        for can_double in (False, True):
+            for can_surrender in (False, True):
+                flags = (dealer_idx, can_double, can_surrender)
+                for total in (*range(4), *range(21, 32)):
+                    index["hard", total, *flags] = "stand" if total >= 17 else "hit"
+                index["soft", 11, *flags] = "hit"
+                index["soft", 21, *flags] = "stand"
+    return index
+
+
+def encode_index(index: dict[DecisionKey, str]) -> list:
+    return [[*key, action] for key, action in index.items()]
+
+
+def decode_index(entries: list) -> dict[DecisionKey, str]:
+    return {
+        (kind, total, dealer_idx, can_double, can_surrender): action
+        for kind, total, dealer_idx, can_double, can_surrender, action in entries
+    }
+
+
+def load_index(
+    rules: Rules = HOUSE_RULES, cache_dir: Path | None = CHART_CACHE_DIR
+) -> dict[DecisionKey, str]:
+    path = cache_dir / f"{rules.key}.json" if cache_dir else None
+    if path and path.exists():
+        return decode_index(json.loads(path.read_text())["index"])
+
+    index = generate_index(rules)
+    if path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps({"rules": asdict(rules), "index": encode_index(index)})
+        )
+        tmp.replace(path)
+    return index
+
+
+def chart_rows(index: dict[DecisionKey, str]) -> dict[str, dict[int, str]]:
+    def row(kind: str, total: int) -> str:
+        return "".join(
+            ACTION_CODES[index[kind, total, dealer_idx, True, True]]
+            for dealer_idx in range(10)
+        )
+
+    return {
+        "hard": {total: row("hard", total) for total in range(21, 4, -1)},
+        "soft": {total: row("soft", total) for total in range(21, 12, -1)},
+        "pair": {total: row("pair", total) for total in (11, *range(10, 1, -1))},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a basic strategy chart from exact expected values"
+    )
+    parser.add_argument(
+        "-r",
+        "--rules",
+        type=parse_rules,
+        default=HOUSE_RULES,
+        help="Rule set, e.g. house or h17,num_decks=2 (default: house)",
+    )
+    parser.add_argument(
+        "--infinite", action="store_true", help="Use an infinite-deck shoe"
+    )
+    parser.add_argument(
+        "--remove",
+        nargs="+",
+        default=[],
+        metavar="RANK",
+        help="Cards already seen, e.g. --remove 5 6 6 A for a count-adjusted chart",
+    )
+    args = parser.parse_args()
+
+    shoe = None
+    if not args.infinite:
+        shoe = shoe_composition(
+            args.rules.num_decks, [CARDS_BY_LABEL[f"{rank}♠"] for rank in args.remove]
+        )
+
+    started = time.perf_counter()
+    index = generate_index(args.rules, args.infinite, shoe)
+    elapsed = time.perf_counter() - started
+
+    print(f"{args.rules} (generated in {elapsed:.2f}s)")
+    print("      2 3 4 5 6 7 8 9 T A")
+    for kind, rows in chart_rows(index).items():
+        for total, row in rows.items():
+            label = "A" if kind == "pair" and total == 11 else str(total)
+            print(f"{kind[0].upper()}{label:>3}  {' '.join(row)}")
+
+
+if __name__ == "__main__":
+    main()
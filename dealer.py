@@ -0,0 +1,145 @@
+import argparse
+from collections.abc import Sequence
+from functools import lru_cache
+
+from blackjack import Card, Rank
+
+ACE, TEN = 0, 9
+
+OUTCOMES = ("17", "18", "19", "20", "21", "bust", "blackjack")
+
+BUST, BLACKJACK = 5, 6
+
+DRAW_CACHE_SIZE = 1 << 18
+
+Composition = tuple[int, ...]
+
+
+def rank_index(rank: Rank) -> int:
+    return ACE if rank == Rank.ACE else rank.points - 1
+
+
+def card_index(card: Card) -> int:
+    return rank_index(card.rank)
+
+
+DECK: Composition = tuple(
+    4 * sum(1 for rank in Rank if rank_index(rank) == index) for index in range(10)
+)
+
+
+def shoe_composition(num_decks: int = 6, removed: Sequence[Card] = ()) -> Composition:
+    counts = [count * num_decks for count in DECK]
+    for card in removed:
+        counts[card_index(card)] -= 1
+    return tuple(counts)
+
+
+def remove(comp: Composition, index: int) -> Composition:
+    return comp[:index] + (comp[index] - 1,) + comp[index + 1 :]
+
+
+def soft_total(hard: int, aces: int) -> int:
+    return hard + 10 if aces and hard <= 11 else hard
+
+
+@lru_cache(maxsize=DRAW_CACHE_SIZE)
+def dealer_draw(
+    hard: int, soft: bool, comp: Composition, hits_soft_17: bool, deplete: bool
+) -> tuple[float, ...]:
+    total = soft_total(hard, soft)
+    outcomes = [0.0] * len(OUTCOMES)
+    if total > 21:
+        outcomes[BUST] = 1.0
+        return tuple(outcomes)
+    if total >= 17 and not (hits_soft_17 and soft and hard == 7):
+        outcomes[total - 17] = 1.0
+        return tuple(outcomes)
+
+    remaining = sum(comp)
+    for index, count in enumerate(comp):
+        if not count:
+            continue
+        sub = dealer_draw(
+            hard + index + 1,
+            soft or index == ACE,
+            remove(comp, index) if deplete else comp,
+            hits_soft_17,
+            deplete,
+        )
+        weight = count / remaining
+        for outcome, p in enumerate(sub):
+            outcomes[outcome] += weight * p
+    return tuple(outcomes)
+
+
+@lru_cache(maxsize=4096)
+def dealer_outcomes(
+    upcard: int,
+    comp: Composition = DECK,
+    hits_soft_17: bool = False,
+    peek: bool = True,
+    deplete: bool = True,
+) -> tuple[float, ...]:
+    blackjack_card = {ACE: TEN, TEN: ACE}.get(upcard)
+    remaining = sum(comp)
+    if peek and blackjack_card is not None:
+        remaining -= comp[blackjack_card]
+
+    outcomes = [0.0] * len(OUTCOMES)
+    for index, count in enumerate(comp):
+        if not count:
+            continue
+        weight = count / remaining
+        if index == blackjack_card:
+            if not peek:
+                outcomes[BLACKJACK] += weight
+            continue
+        sub = dealer_draw(
+            upcard + index + 2,
+            upcard == ACE or index == ACE,
+            remove(comp, index) if deplete else comp,
+            hits_soft_17,
+            deplete,
+        )
+        for outcome, p in enumerate(sub):
+            outcomes[outcome] += weight * p
+    return tuple(outcomes)
+
+
+def cache_info() -> dict[str, int]:
+    draw = dealer_draw.cache_info()
+    outcomes = dealer_outcomes.cache_info()
+    return {
+        "draw_hits": draw.hits,
+        "draw_misses": draw.misses,
+        "draw_size": draw.currsize,
+        "outcome_hits": outcomes.hits,
+        "outcome_misses": outcomes.misses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Dealer final-total probabilities by upcard"
+    )
+    parser.add_argument(
+        "-d", "--decks", type=int, default=6, help="Decks in the shoe; 0 for infinite"
+    )
+    parser.add_argument("--h17", action="store_true", help="Dealer hits soft 17")
+    parser.add_argument("--no-peek", action="store_true", help="Dealer does not peek")
+    args = parser.parse_args()
+
+    comp = shoe_composition(args.decks) if args.decks else DECK
+    labels = ["A", *map(str, range(2, 11))]
+    print("Up  " + "".join(f"{outcome:>10}" for outcome in OUTCOMES))
+    for upcard, label in enumerate(labels):
+        start = remove(comp, upcard) if args.decks else comp
+        outcomes = dealer_outcomes(
+            upcard, start, args.h17, not args.no_peek, deplete=bool(args.decks)
+        )
+        print(f"{label:<4}" + "".join(f"{p:>10.4f}" for p in outcomes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import hashlib
+import sqlite3
+from typing import Literal
+
+from blackjack import Card, Hand, Rank
+from rules import HOUSE_RULES
+
+DEFAULT_CACHE_PATH = ".llm_cache.sqlite"
+
+KeyMode = Literal["prompt", "canonical"]
+
+KEY_MODES: tuple[KeyMode, ...] = ("prompt", "canonical")
+
+
+def rank_label(card: Card) -> str:
+    return "A" if card.rank == Rank.ACE else str(card.value)
+
+
+def canonical_state(hand: Hand, dealer_upcard: Card, actions: list[str]) -> str:
+    player = ",".join(sorted((rank_label(card) for card in hand.cards), reverse=True))
+    state = f"{player}|{rank_label(dealer_upcard)}|{','.join(actions)}"
+    return state if hand.rules == HOUSE_RULES else f"{state}|{hand.rules.key}"
+
+
+class DecisionCache:
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, key_mode: KeyMode = "prompt"):
+        if key_mode not in KEY_MODES:
+            raise ValueError(f"Unknown cache key mode: {key_mode}")
+        self.path = path
+        self.key_mode = key_mode
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS decisions ("
+            "model TEXT NOT NULL, key TEXT NOT NULL, decision TEXT NOT NULL, "
+            "PRIMARY KEY (model, key))"
+        )
+        self.conn.commit()
+
+    def key(
+        self, prompt: str, hand: Hand, dealer_upcard: Card, actions: list[str]
+    ) -> str:
+        if self.key_mode == "canonical":
+            return "canonical:" + canonical_state(hand, dealer_upcard, actions)
+        return "prompt:" + hashlib.sha256(prompt.encode()).hexdigest()
+
+    def get(self, model: str, key: str) -> str | None:
+        row = self.conn.execute(
+            "SELECT decision FROM decisions WHERE model = ? AND key = ?",
+            (model, key),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, model: str, key: str, decision: str):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO decisions (model, key, decision) VALUES (?, ?, ?)",
+            (model, key, decision),
+        )
+        self.conn.commit()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        self.conn.close()
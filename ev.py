@@ -0,0 +1,255 @@
+import argparse
+import csv
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import replace
+from functools import cache, lru_cache
+
+from blackjack import CARDS_BY_LABEL, Card
+from dealer import (
+    ACE,
+    BLACKJACK,
+    BUST,
+    DECK,
+    Composition,
+    card_index,
+    dealer_outcomes,
+    shoe_composition,
+    soft_total,
+)
+from rules import HOUSE_RULES, Rules, label_rules, parse_rules
+
+DEALER_TOTALS = range(17, 22)
+
+EV_FIELDS = ["ev", "best_ev", "ev_lost"]
+
+
+@lru_cache(maxsize=64)
+def split_hand_counts(pair_prob: float, max_hands: int) -> tuple[float, float]:
+    @cache
+    def counts(pending: int, hands: int) -> tuple[float, float]:
+        if not pending:
+            return 0.0, 0.0
+        unpaired, paired = counts(pending - 1, hands)
+        if hands < max_hands:
+            resplit = counts(pending + 1, hands + 1)
+        else:
+            resplit = (unpaired, paired + 1)
+        return (
+            (1 - pair_prob) * (unpaired + 1) + pair_prob * resplit[0],
+            (1 - pair_prob) * paired + pair_prob * resplit[1],
+        )
+
+    return counts(2, 2)
+
+
+class Analyzer:
+    def __init__(
+        self,
+        upcard: int,
+        comp: Composition,
+        deplete: bool = False,
+        rules: Rules = HOUSE_RULES,
+    ):
+        self.rules = rules
+        total = sum(comp)
+        self.probs = [count / total for count in comp]
+        dealer = dealer_outcomes(
+            upcard, comp, rules.hits_soft_17, rules.peek, deplete=deplete
+        )
+        self.stand_evs = [self._stand(total, dealer) for total in range(22)]
+        self.hit_memo: dict[tuple[int, int], float] = {}
+
+    @staticmethod
+    def _stand(total: int, dealer: tuple[float, ...]) -> float:
+        ev = dealer[BUST] - dealer[BLACKJACK]
+        for dealer_total, p in zip(DEALER_TOTALS, dealer):
+            if total > dealer_total:
+                ev += p
+            elif total < dealer_total:
+                ev -= p
+        return ev
+
+    def stand(self, hard: int, aces: int) -> float:
+        total = soft_total(hard, aces)
+        return -1.0 if total > 21 else self.stand_evs[total]
+
+    def hit(self, hard: int, aces: int) -> float:
+        key = (hard, min(aces, 1))
+        if key not in self.hit_memo:
+            ev = 0.0
+            for index, p in enumerate(self.probs):
+                if p:
+                    ev += p * self.play(hard + index + 1, aces + (index == ACE))
+            self.hit_memo[key] = ev
+        return self.hit_memo[key]
+
+    def play(self, hard: int, aces: int) -> float:
+        if soft_total(hard, aces) > 21:
+            return -1.0
+        return max(self.stand(hard, aces), self.hit(hard, aces))
+
+    def double(self, hard: int, aces: int) -> float:
+        return 2 * sum(
+            p * self.stand(hard + index + 1, aces + (index == ACE))
+            for index, p in enumerate(self.probs)
+        )
+
+    def split(self, pair: int) -> float:
+        hands = []
+        for index in range(len(self.probs)):
+            hard, aces = pair + index + 2, (pair == ACE) + (index == ACE)
+            if pair == ACE:
+                hands.append(self.stand(hard, aces))
+            elif self.rules.double_after_split:
+                hands.append(max(self.play(hard, aces), self.double(hard, aces)))
+            else:
+                hands.append(self.play(hard, aces))
+
+        pair_prob = self.probs[pair]
+        if pair == ACE or self.rules.max_split_hands <= 2 or not 0 < pair_prob < 1:
+            return 2 * sum(p * ev for p, ev in zip(self.probs, hands))
+
+        unpaired_ev = sum(
+            p * ev
+            for index, (p, ev) in enumerate(zip(self.probs, hands))
+            if index != pair
+        ) / (1 - pair_prob)
+        unpaired, paired = split_hand_counts(pair_prob, self.rules.max_split_hands)
+        return unpaired * unpaired_ev + paired * hands[pair]
+
+    def action_evs(self, cards: list[int], is_split: bool = False) -> dict[str, float]:
+        hard = sum(cards) + len(cards)
+        aces = cards.count(ACE)
+        evs = {"stand": self.stand(hard, aces), "hit": self.hit(hard, aces)}
+        if len(cards) != 2:
+            return evs
+        if not is_split or self.rules.double_after_split:
+            evs["double"] = self.double(hard, aces)
+        can_resplit = self.rules.max_split_hands > 2 and cards[0] != ACE
+        if cards[0] == cards[1] and (not is_split or can_resplit):
+            evs["split"] = self.split(cards[0])
+        if not is_split and self.rules.surrender:
+            evs["surrender"] = -0.5
+        return evs
+
+
+@lru_cache(maxsize=4096)
+def get_analyzer(
+    upcard: int, comp: Composition, deplete: bool, rules: Rules = HOUSE_RULES
+) -> Analyzer:
+    return Analyzer(upcard, comp, deplete, rules)
+
+
+def evaluate(
+    player: list[Card],
+    upcard: Card,
+    is_split: bool = False,
+    rules: Rules = HOUSE_RULES,
+    infinite: bool = False,
+) -> dict[str, float]:
+    if infinite:
+        comp = DECK
+    else:
+        comp = shoe_composition(rules.num_decks, [*player, upcard])
+    analyzer = get_analyzer(card_index(upcard), comp, not infinite, rules)
+    return analyzer.action_evs([card_index(card) for card in player], is_split)
+
+
+def iter_annotated(
+    rows: Iterable[dict], rules: Rules | None = None, infinite: bool = False
+) -> Iterator[dict]:
+    split_hand = None
+    for row in rows:
+        if row["action"] == "none":
+            row.update(dict.fromkeys(EV_FIELDS, ""))
+            yield row
+            continue
+
+        hand_key = (row["hand_id"], row["strategy"])
+        evs = evaluate(
+            [CARDS_BY_LABEL[label] for label in row["player_cards"].split()],
+            CARDS_BY_LABEL[row["dealer_upcard"]],
+            hand_key == split_hand,
+            rules or label_rules(row["strategy"]),
+            infinite,
+        )
+        if row["action"] == "split":
+            split_hand = hand_key
+        if row["action"] not in evs:
+            row.update(dict.fromkeys(EV_FIELDS, ""))
+            yield row
+            continue
+
+        best = max(evs.values())
+        ev = evs[row["action"]]
+        row.update(ev=f"{ev:.6f}", best_ev=f"{best:.6f}", ev_lost=f"{best - ev:.6f}")
+        yield row
+
+
+def annotate(
+    rows: list[dict], rules: Rules | None = None, infinite: bool = False
+) -> list[dict]:
+    for _ in iter_annotated(rows, rules, infinite):
+        pass
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Annotate benchmark results with the expected value of each play"
+    )
+    parser.add_argument("input", help="Benchmark CSV file")
+    parser.add_argument(
+        "-o", "--output", type=str, help="Output CSV file (default: overwrite input)"
+    )
+    parser.add_argument(
+        "-r",
+        "--rules",
+        type=parse_rules,
+        help="Rule set for every row, e.g. house or h17,num_decks=2 "
+        "(default: from each row's strategy label, e.g. llm@h17)",
+    )
+    parser.add_argument(
+        "-d",
+        "--decks",
+        type=int,
+        help="Decks in the shoe, overriding the rule set; 0 for an infinite deck",
+    )
+    args = parser.parse_args()
+
+    rules = args.rules
+    if args.decks:
+        rules = replace(rules or HOUSE_RULES, num_decks=args.decks)
+
+    with open(args.input, newline="") as f:
+        reader = csv.DictReader(f)
+        fieldnames = [
+            *(name for name in reader.fieldnames or [] if name not in EV_FIELDS),
+            *EV_FIELDS,
+        ]
+        rows = list(reader)
+
+    started = time.perf_counter()
+    annotate(rows, rules, infinite=args.decks == 0)
+    elapsed = time.perf_counter() - started
+
+    output = args.output or args.input
+    with open(output, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    lost: dict[str, float] = {}
+    for row in rows:
+        if row["ev_lost"]:
+            lost[row["strategy"]] = lost.get(row["strategy"], 0.0) + float(
+                row["ev_lost"]
+            )
+    print(f"Annotated {len(rows)} rows in {elapsed:.2f}s -> {output}")
+    for strategy, total in sorted(lost.items()):
+        print(f"  {strategy}: {total:.2f} units of EV lost")
+
+
+if __name__ == "__main__":
+    main()
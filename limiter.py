@@ -0,0 +1,125 @@
+import asyncio
+import time
+from collections import deque
+
+RATE_LIMIT_STATUS = {408, 429}
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+RATE_LIMIT_NAMES = ("RateLimit", "Timeout", "ResourceExhausted", "Overloaded")
+
+RETRYABLE_NAMES = RATE_LIMIT_NAMES + (
+    "Connection",
+    "ServiceUnavailable",
+    "InternalServer",
+    "DeadlineExceeded",
+)
+
+
+def error_status(exc: BaseException) -> int | None:
+    status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError)):
+        return True
+    if error_status(exc) in RATE_LIMIT_STATUS:
+        return True
+    return any(name in type(exc).__name__ for name in RATE_LIMIT_NAMES)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if is_rate_limited(exc) or error_status(exc) in RETRYABLE_STATUS:
+        return True
+    return any(name in type(exc).__name__ for name in RETRYABLE_NAMES)
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        initial: int = 5,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff: float = 0.5,
+        latency_tolerance: float = 2.0,
+        window: float = 10.0,
+    ):
+        self.limit = float(max(min_limit, min(initial, max_limit)))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.window = window
+        self.in_flight = 0
+        self.successes = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.baseline_latency: float | None = None
+        self.last_decrease = 0.0
+        self.completions: deque[float] = deque()
+        self.available = asyncio.Condition()
+
+    @property
+    def current_limit(self) -> int:
+        return int(self.limit)
+
+    @property
+    def requests_per_second(self) -> float:
+        self._trim(time.monotonic())
+        return len(self.completions) / self.window
+
+    async def acquire(self):
+        async with self.available:
+            await self.available.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, latency: float, error: BaseException | None = None):
+        now = time.monotonic()
+        self.in_flight -= 1
+
+        if error is None:
+            self.successes += 1
+            self.completions.append(now)
+            self._trim(now)
+            if self._healthy(latency):
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            else:
+                self._decrease(now)
+        else:
+            self.errors += 1
+            if is_rate_limited(error):
+                self.rate_limited += 1
+                self._decrease(now)
+
+        async with self.available:
+            self.available.notify_all()
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "limit": self.current_limit,
+            "in_flight": self.in_flight,
+            "rps": self.requests_per_second,
+            "successes": self.successes,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+        }
+
+    def _healthy(self, latency: float) -> bool:
+        if self.baseline_latency is None:
+            self.baseline_latency = latency
+            return True
+        healthy = latency <= self.baseline_latency * self.latency_tolerance
+        self.baseline_latency = 0.9 * self.baseline_latency + 0.1 * latency
+        return healthy
+
+    def _decrease(self, now: float):
+        cooldown = self.baseline_latency or 1.0
+        if now - self.last_decrease < cooldown:
+            return
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        self.last_decrease = now
+
+    def _trim(self, now: float):
+        while self.completions and now - self.completions[0] > self.window:
+            self.completions.popleft()
@@ -1,53 +1,326 @@
+import asyncio
 import os
-from dataclasses import dataclass
+import random
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, replace
 from functools import cache
-from typing import Annotated, TypedDict, cast
+from typing import Annotated, Self, TypedDict, cast
 
 from dotenv import load_dotenv
 from langchain.chat_models import init_chat_model
 
 from blackjack import Game, Hand
+from decision_cache import DEFAULT_CACHE_PATH, DecisionCache, KeyMode
+from limiter import AdaptiveLimiter, error_status, is_retryable
+from rules import HOUSE_RULES, Rules
+from stub import StubChatModel, parse_profile
+from tracing import span
 
 load_dotenv()
 
-PROMPT_TEMPLATE = """Your hand: {hand} ({hand_value})
+POSITION_TEMPLATE = """Your hand: {hand} ({hand_value})
 Dealer shows: {dealer_upcard}
-Available actions: {actions}
+Available actions: {actions}"""
 
-What is the optimal play?"""
+RULES_TEMPLATE = "House rules: {rules}\n"
+
+PROMPT_QUESTION = "\n\nWhat is the optimal play?"
+
+PROMPT_TEMPLATE = POSITION_TEMPLATE + PROMPT_QUESTION
+
+BATCH_PROMPT_TEMPLATE = """What is the optimal play for each of these {count} positions?
+Answer with exactly one decision per position, in the same order.
+
+{positions}"""
+
+MAX_RETRIES = 25
 
 
 class DecisionResponse(TypedDict):
     decision: Annotated[str, ..., "The optimal blackjack decision."]
 
 
+class BatchDecisionResponse(TypedDict):
+    decisions: Annotated[
+        list[str], ..., "The optimal blackjack decision for each position, in order."
+    ]
+
+
 @cache
-def get_model():
+def get_chat_model():
     model_name = os.getenv("MODEL")
     if not model_name:
         raise ValueError("MODEL environment variable not set")
 
-    if model_name.startswith("openrouter:"):
+    if model_name.startswith("stub:"):
+        model = StubChatModel(parse_profile(model_name.removeprefix("stub:")))
+    elif model_name.startswith("openrouter:"):
         actual_model_name = model_name.replace("openrouter:", "", 1)
         model = init_chat_model(
             model=actual_model_name,
             model_provider="openai",
             base_url="https://openrouter.ai/api/v1",
             api_key=os.getenv("OPENROUTER_API_KEY"),
-            max_retries=25,
+            max_retries=0,
         )
     else:
-        model = init_chat_model(model_name, max_retries=25)
+        model = init_chat_model(model_name, max_retries=0)
+
+    return model
+
+
+@cache
+def get_model():
+    return get_chat_model().with_structured_output(DecisionResponse, include_raw=True)
+
+
+@cache
+def get_batch_model():
+    return get_chat_model().with_structured_output(
+        BatchDecisionResponse, include_raw=True
+    )
+
+
+_decision_cache: DecisionCache | None = None
+_cache_configured = False
+
+
+def configure_cache(
+    path: str | None = DEFAULT_CACHE_PATH, key_mode: KeyMode = "prompt"
+):
+    global _decision_cache, _cache_configured
+    if _decision_cache:
+        _decision_cache.close()
+    _decision_cache = DecisionCache(path, key_mode) if path else None
+    _cache_configured = True
+
+
+def get_decision_cache() -> DecisionCache | None:
+    if not _cache_configured:
+        path = os.getenv("LLM_CACHE", DEFAULT_CACHE_PATH)
+        key_mode = cast(KeyMode, os.getenv("LLM_CACHE_KEY", "prompt"))
+        configure_cache(None if path.lower() in ("", "off") else path, key_mode)
+    return _decision_cache
 
-    return model.with_structured_output(DecisionResponse)
+
+_limiter: AdaptiveLimiter | None = None
+
+
+def configure_limiter(limiter: AdaptiveLimiter | None):
+    global _limiter
+    _limiter = limiter
+
+
+def get_limiter() -> AdaptiveLimiter | None:
+    return _limiter
+
+
+def retry_delay(attempt: int) -> float:
+    return min(60.0, 0.5 * 2**attempt) * random.uniform(0.5, 1.5)
+
+
+@dataclass
+class CallMetrics:
+    latency: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    retries: int = 0
+    error: str = ""
+    retry_error: str = ""
 
 
 @dataclass
 class Recommendation:
     decision: str
+    metrics: CallMetrics | None = None
+
+
+def record_usage(raw, metrics: CallMetrics):
+    usage = getattr(raw, "usage_metadata", None) or {}
+    metrics.input_tokens += usage.get("input_tokens", 0)
+    metrics.output_tokens += usage.get("output_tokens", 0)
+
+
+async def invoke_model(prompt: str, model=None, metrics: CallMetrics | None = None):
+    model = model or get_model()
+    metrics = metrics if metrics is not None else CallMetrics()
+    limiter = _limiter
+    first_started = time.perf_counter()
+    for attempt in range(MAX_RETRIES + 1):
+        if limiter:
+            with span("limiter_wait"):
+                await limiter.acquire()
+        started = time.perf_counter()
+        error: Exception | None = None
+        try:
+            with span("model_call", attempt=attempt):
+                response = await model.ainvoke(prompt)
+            record_usage(response["raw"], metrics)
+            if response["parsing_error"]:
+                raise response["parsing_error"]
+            metrics.error = ""
+            return response["parsed"]
+        except Exception as e:
+            error = e
+            metrics.error = type(e).__name__
+            if not is_retryable(e) or attempt == MAX_RETRIES:
+                raise
+            metrics.retry_error = metrics.error
+        finally:
+            if limiter:
+                await limiter.release(time.perf_counter() - started, error)
+            metrics.latency = time.perf_counter() - first_started
+        metrics.retries += 1
+        await asyncio.sleep(retry_delay(attempt))
+
+
+@dataclass
+class DecisionStats:
+    requests: int = 0
+    decisions: int = 0
+    latency: float = 0.0
+    fallbacks: int = 0
+
+    def reset(self):
+        self.requests = self.decisions = self.fallbacks = 0
+        self.latency = 0.0
+
+    def add(self, other: Self):
+        self.requests += other.requests
+        self.decisions += other.decisions
+        self.latency += other.latency
+        self.fallbacks += other.fallbacks
+
+    @property
+    def decisions_per_request(self) -> float:
+        return self.decisions / self.requests if self.requests else 0.0
+
+    @property
+    def latency_per_decision(self) -> float:
+        return self.latency / self.decisions if self.decisions else 0.0
+
 
+single_stats = DecisionStats()
 
-def build_prompt(hand: Hand, dealer_upcard: str) -> str:
+CONTEXT_LIMIT_MARKERS = ("context length", "context_length", "too long", "too large")
+
+
+def is_batch_error(exc: BaseException) -> bool:
+    if isinstance(exc, ValueError):
+        return True
+    message = str(exc).lower()
+    return error_status(exc) in (400, 413) and any(
+        marker in message for marker in CONTEXT_LIMIT_MARKERS
+    )
+
+
+class DecisionBatcher:
+    def __init__(self, batch_size: int = 10, max_wait: float = 0.05):
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.stats = DecisionStats()
+        self.pending: list[tuple[str, asyncio.Future[Recommendation]]] = []
+        self.timer: asyncio.TimerHandle | None = None
+        self.in_flight: set[asyncio.Task] = set()
+
+    async def decide(self, position: str) -> Recommendation:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[Recommendation] = loop.create_future()
+        self.pending.append((position, future))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.max_wait, self.flush)
+
+        started = time.perf_counter()
+        recommendation = await future
+        latency = time.perf_counter() - started
+        self.stats.decisions += 1
+        self.stats.latency += latency
+        return replace(
+            recommendation, metrics=replace(recommendation.metrics, latency=latency)
+        )
+
+    def flush(self):
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            task = asyncio.create_task(self.send(batch))
+            self.in_flight.add(task)
+            task.add_done_callback(self.in_flight.discard)
+
+    async def send(self, batch: list[tuple[str, asyncio.Future[Recommendation]]]):
+        positions = "\n\n".join(
+            f"Position {i}:\n{position}" for i, (position, _) in enumerate(batch, 1)
+        )
+        prompt = BATCH_PROMPT_TEMPLATE.format(count=len(batch), positions=positions)
+        metrics = CallMetrics()
+        try:
+            self.stats.requests += 1
+            response = cast(
+                BatchDecisionResponse,
+                await invoke_model(prompt, get_batch_model(), metrics),
+            )
+            decisions = response["decisions"] if response else []
+            if len(decisions) != len(batch):
+                raise ValueError(
+                    f"Expected {len(batch)} decisions, got {len(decisions)}"
+                )
+        except Exception as e:
+            if not is_batch_error(e):
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            self.stats.fallbacks += 1
+            await asyncio.gather(
+                *(self.send_single(position, future) for position, future in batch)
+            )
+            return
+
+        share = replace(
+            metrics,
+            input_tokens=metrics.input_tokens // len(batch),
+            output_tokens=metrics.output_tokens // len(batch),
+        )
+        for (_, future), decision in zip(batch, decisions):
+            if not future.done():
+                future.set_result(Recommendation(decision, share))
+
+    async def send_single(self, position: str, future: asyncio.Future[Recommendation]):
+        metrics = CallMetrics()
+        try:
+            self.stats.requests += 1
+            response = cast(
+                DecisionResponse,
+                await invoke_model(position + PROMPT_QUESTION, metrics=metrics),
+            )
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(Recommendation(response["decision"], metrics))
+
+
+_batcher: DecisionBatcher | None = None
+
+
+def configure_batcher(batch_size: int = 10, max_wait: float = 0.05):
+    global _batcher
+    _batcher = DecisionBatcher(batch_size, max_wait)
+
+
+def get_batcher() -> DecisionBatcher:
+    if _batcher is None:
+        configure_batcher()
+    return cast(DecisionBatcher, _batcher)
+
+
+def available_actions(hand: Hand) -> list[str]:
     actions = ["hit", "stand"]
     if hand.can_double:
         actions.append("double")
@@ -55,24 +328,104 @@ def build_prompt(hand: Hand, dealer_upcard: str) -> str:
         actions.append("split")
     if hand.can_surrender:
         actions.append("surrender")
+    return actions
 
-    return PROMPT_TEMPLATE.format(
+
+def build_position(hand: Hand, dealer_upcard: str, rules: Rules | None = None) -> str:
+    rules = rules or hand.rules
+    position = POSITION_TEMPLATE.format(
         hand=hand,
         hand_value=hand.value,
         dealer_upcard=dealer_upcard,
-        actions=", ".join(actions),
+        actions=", ".join(available_actions(hand)),
     )
+    if rules == HOUSE_RULES:
+        return position
+    return RULES_TEMPLATE.format(rules=rules.describe()) + position
 
 
-async def get_recommendation(game: Game) -> Recommendation | None:
+def build_prompt(hand: Hand, dealer_upcard: str, rules: Rules | None = None) -> str:
+    return build_position(hand, dealer_upcard, rules) + PROMPT_QUESTION
+
+
+async def decide_single(position: str) -> Recommendation:
+    metrics = CallMetrics()
+    response = cast(
+        DecisionResponse,
+        await invoke_model(position + PROMPT_QUESTION, metrics=metrics),
+    )
+    single_stats.requests += 1
+    single_stats.decisions += 1
+    single_stats.latency += metrics.latency
+    return Recommendation(response["decision"], metrics)
+
+
+_in_flight: dict[tuple[str, str], asyncio.Future[Recommendation]] = {}
+
+coalesced_requests = 0
+
+
+async def coalesce(
+    key: tuple[str, str], decide: Callable[[], Awaitable[Recommendation]]
+) -> Recommendation:
+    global coalesced_requests
+    future = _in_flight.get(key)
+    if future is None:
+        future = _in_flight[key] = asyncio.ensure_future(decide())
+        future.add_done_callback(lambda _: _in_flight.pop(key, None))
+        return await asyncio.shield(future)
+    coalesced_requests += 1
+    return replace(await asyncio.shield(future), metrics=None)
+
+
+async def decide_and_cache(
+    decide: Callable[[str], Awaitable[Recommendation]],
+    position: str,
+    cache: DecisionCache,
+    model_name: str,
+    key: str,
+) -> Recommendation:
+    recommendation = await decide(position)
+    cache.put(model_name, key, recommendation.decision)
+    return recommendation
+
+
+async def recommend(
+    game: Game,
+    decide: Callable[[str], Awaitable[Recommendation]],
+    cache_suffix: str = "",
+) -> Recommendation | None:
     if not game.round_active or not game.current_hand:
         return None
 
     hand = game.current_hand
     dealer_upcard = str(game.dealer_hand.cards[0])
 
-    prompt = build_prompt(hand, dealer_upcard)
-    response = await get_model().ainvoke(prompt)
-    response = cast(DecisionResponse, response)
+    position = build_position(hand, dealer_upcard, game.rules)
+
+    cache = get_decision_cache()
+    if not cache:
+        return await decide(position)
+
+    model_name = os.getenv("MODEL", "") + cache_suffix
+    key = cache.key(
+        position + PROMPT_QUESTION,
+        hand,
+        game.dealer_hand.cards[0],
+        available_actions(hand),
+    )
+    decision = cache.get(model_name, key)
+    if decision is not None:
+        return Recommendation(decision)
+    return await coalesce(
+        (model_name, key),
+        lambda: decide_and_cache(decide, position, cache, model_name, key),
+    )
+
+
+async def get_recommendation(game: Game) -> Recommendation | None:
+    return await recommend(game, decide_single)
+
 
-    return Recommendation(decision=response["decision"])
+async def get_batch_recommendation(game: Game) -> Recommendation | None:
+    return await recommend(game, get_batcher().decide, cache_suffix="#batch")
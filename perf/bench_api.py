@@ -0,0 +1,80 @@
+import argparse
+import asyncio
+import socket
+import statistics
+import threading
+import time
+
+import httpx
+import uvicorn
+
+from api import app
+
+STAND_BUTTON = 'hx-post="/stand"'
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int) -> uvicorn.Server:
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+async def play(base_url: str, deadline: float, latencies: list[float]):
+    async with httpx.AsyncClient(base_url=base_url) as client:
+
+        async def post(path: str) -> str:
+            started = time.perf_counter()
+            response = await client.post(path)
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+            return response.text
+
+        while time.perf_counter() < deadline:
+            html = await post("/deal")
+            while STAND_BUTTON in html:
+                html = await post("/stand")
+
+
+async def run(base_url: str, clients: int, duration: float) -> list[float]:
+    latencies: list[float] = []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(play(base_url, deadline, latencies) for _ in range(clients)))
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deal/stand loop against uvicorn")
+    parser.add_argument("-c", "--clients", type=int, default=10)
+    parser.add_argument("-d", "--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    port = free_port()
+    server = start_server(port)
+    try:
+        started = time.perf_counter()
+        latencies = asyncio.run(
+            run(f"http://127.0.0.1:{port}", args.clients, args.duration)
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        server.should_exit = True
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{args.clients} clients for {elapsed:.1f}s")
+    print(f"Throughput: {len(latencies) / elapsed:,.0f} req/s")
+    print(
+        f"Latency:    p50 {quantiles[49] * 1e3:.1f} ms, p99 {quantiles[98] * 1e3:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import time
+from dataclasses import replace
+
+from blackjack import Game, Hand
+from strategy import get_optimal_play
+
+
+def collect_positions(num_hands: int) -> list[tuple[Hand, Hand]]:
+    positions = []
+    for seed in range(num_hands):
+        game = Game(seed=seed)
+        game.deal()
+        while game.round_active and game.current_hand:
+            hand = game.current_hand
+            positions.append((replace(hand, cards=list(hand.cards)), game.dealer_hand))
+            execute(game, get_optimal_play(game.current_hand, game.dealer_hand))
+    return positions
+
+
+def execute(game: Game, action: str):
+    match action:
+        case "hit":
+            game.hit()
+        case "stand":
+            game.stand()
+        case "double":
+            game.double_down()
+        case "split":
+            game.split()
+        case "surrender":
+            game.surrender()
+
+
+def play_hands(num_hands: int):
+    game = Game(seed=0)
+    for _ in range(num_hands):
+        game.deal()
+        while game.round_active and game.current_hand:
+            execute(game, get_optimal_play(game.current_hand, game.dealer_hand))
+
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimal strategy micro-benchmark")
+    parser.add_argument("-n", "--num-hands", type=int, default=20_000)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    positions = collect_positions(args.num_hands)
+
+    def decide_all():
+        for hand, dealer in positions:
+            get_optimal_play(hand, dealer)
+
+    def value_all():
+        return sum(hand.value for hand, _ in positions)
+
+    decision = best_of(args.repeat, decide_all) / len(positions)
+    value = best_of(args.repeat, value_all) / len(positions)
+    hand = best_of(args.repeat, lambda: play_hands(args.num_hands)) / args.num_hands
+    print(f"Hand.value:       {value * 1e9:.0f} ns/access")
+    print(f"get_optimal_play: {decision * 1e9:.0f} ns/decision")
+    print(f"optimal hand:     {hand * 1e6:.2f} us/hand")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from api import app
+from sessions import (
+    SESSION_COOKIE,
+    MemorySessionStore,
+    SQLiteSessionStore,
+    configure_session_store,
+)
+
+STAND_BUTTON = 'hx-post="/stand"'
+
+
+async def play_session(
+    session: int, rounds: int, latencies: list[float]
+) -> tuple[str, int]:
+    rng = random.Random(session)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+
+        async def post(path: str) -> str:
+            started = time.perf_counter()
+            response = await client.post(path)
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+            return response.text
+
+        for _ in range(rounds):
+            html = await post("/deal")
+            while STAND_BUTTON in html:
+                html = await post("/hit" if rng.random() < 0.3 else "/stand")
+        return client.cookies[SESSION_COOKIE], rounds
+
+
+async def run(sessions: int, rounds: int, concurrency: int) -> tuple[list, list]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def limited(session: int) -> tuple[str, int]:
+        async with semaphore:
+            return await play_session(session, rounds, latencies)
+
+    results = await asyncio.gather(*(limited(i) for i in range(sessions)))
+    return results, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent web session load test")
+    parser.add_argument("-n", "--sessions", type=int, default=500)
+    parser.add_argument("-r", "--rounds", type=int, default=5)
+    parser.add_argument("-c", "--concurrency", type=int, default=100)
+    parser.add_argument(
+        "--store",
+        choices=["memory", "sqlite"],
+        default="memory",
+        help="Session store to load (sqlite uses a temporary file)",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.store == "sqlite":
+            store = SQLiteSessionStore(str(Path(tmp) / "sessions.sqlite"))
+        else:
+            store = MemorySessionStore()
+        configure_session_store(store)
+
+        started = time.perf_counter()
+        results, latencies = asyncio.run(
+            run(args.sessions, args.rounds, args.concurrency)
+        )
+        elapsed = time.perf_counter() - started
+
+        mixed = sum(
+            1
+            for session_id, rounds in results
+            if (game := store.get(session_id)) is None
+            or game.stats.hands_played != rounds
+        )
+        stored = len(store)
+        if isinstance(store, SQLiteSessionStore):
+            store.close()
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{args.sessions} sessions x {args.rounds} rounds ({args.store} store)")
+    print(f"Requests:   {len(latencies)} in {elapsed:.2f}s")
+    print(f"Throughput: {len(latencies) / elapsed:,.0f} req/s")
+    print(
+        f"Latency:    p50 {quantiles[49] * 1e3:.1f} ms, p99 {quantiles[98] * 1e3:.1f} ms"
+    )
+    print(f"Sessions:   {stored} stored, {mixed} with another session's hands")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import argparse
+import asyncio
+import csv
+import gc
+import io
+import json
+import multiprocessing
+import platform
+import random
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from benchmark import FIELDNAMES, play_hand
+from blackjack import EncodedShoe, Game, Shoe
+from llm import Recommendation, available_actions
+from perf.bench_strategy import collect_positions, play_hands
+from strategy import get_optimal_play
+from visualize import get_model_stats
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+DEFAULT_THRESHOLD = 0.25
+
+MIN_SAMPLE_NS = 100_000_000
+
+
+@dataclass
+class Result:
+    ns_per_op: float
+    median_ns_per_op: float
+    ops: int
+
+
+Case = Callable[[], tuple[Callable[[], object], int]]
+
+
+def shoe_reshuffle():
+    shoe = Shoe(seed=0)
+    return lambda: [shoe.reshuffle() for _ in range(100)], 100
+
+
+def encoded_shoe_reshuffle():
+    shoe = EncodedShoe()
+    return lambda: [shoe.reshuffle() for _ in range(1000)], 1000
+
+
+def hand_value():
+    positions = collect_positions(5000)
+    return lambda: sum(hand.value for hand, _ in positions), len(positions)
+
+
+def game_deal():
+    seeds = range(1000)
+
+    def deal_all():
+        for seed in seeds:
+            Game(seed=seed).deal()
+
+    return deal_all, len(seeds)
+
+
+def optimal_play():
+    positions = collect_positions(5000)
+
+    def decide_all():
+        for hand, dealer in positions:
+            get_optimal_play(hand, dealer)
+
+    return decide_all, len(positions)
+
+
+def optimal_hands():
+    return lambda: play_hands(5000), 5000
+
+
+def benchmark_csv(num_hands: int, accuracy: float = 0.9) -> str:
+    rng = random.Random(0)
+
+    async def strategy_noisy(game: Game) -> Recommendation:
+        if rng.random() < accuracy:
+            return Recommendation(get_optimal_play(game.current_hand, game.dealer_hand))
+        return Recommendation(rng.choice(available_actions(game.current_hand)))
+
+    async def play_all():
+        return [
+            await play_hand(seed, seed, "llm", strategy_noisy)
+            for seed in range(num_hands)
+        ]
+
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=FIELDNAMES)
+    writer.writeheader()
+    for records in asyncio.run(play_all()):
+        writer.writerows(asdict(record) for record in records)
+    return out.getvalue()
+
+
+def model_stats():
+    text = benchmark_csv(1000)
+    return lambda: get_model_stats(csv.DictReader(io.StringIO(text))), 1000
+
+
+CASES: dict[str, Case] = {
+    "Shoe.reshuffle": shoe_reshuffle,
+    "EncodedShoe.reshuffle": encoded_shoe_reshuffle,
+    "Hand.value": hand_value,
+    "Game.deal": game_deal,
+    "get_optimal_play": optimal_play,
+    "optimal hand": optimal_hands,
+    "visualize.get_model_stats": model_stats,
+}
+
+
+def time_loops(fn: Callable[[], object], loops: int) -> int:
+    started = time.perf_counter_ns()
+    for _ in range(loops):
+        fn()
+    return time.perf_counter_ns() - started
+
+
+def measure(case: Case, repeat: int) -> Result:
+    fn, ops = case()
+    loops = max(1, MIN_SAMPLE_NS // time_loops(fn, 1))
+    samples = []
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            samples.append(time_loops(fn, loops) / (loops * ops))
+    finally:
+        gc.enable()
+    return Result(min(samples), statistics.median(samples), loops * ops)
+
+
+def run_cases(names: list[str], repeat: int) -> dict[str, Result]:
+    return {name: measure(CASES[name], repeat) for name in names}
+
+
+def run_processes(names: list[str], repeat: int, processes: int) -> dict[str, Result]:
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    for _ in range(processes):
+        with context.Pool(1) as pool:
+            runs.append(pool.apply(run_cases, (names, repeat)))
+    return {
+        name: Result(
+            min(run[name].ns_per_op for run in runs),
+            statistics.median(run[name].median_ns_per_op for run in runs),
+            sum(run[name].ops for run in runs),
+        )
+        for name in names
+    }
+
+
+def environment() -> dict[str, str]:
+    major, minor, _ = platform.python_version_tuple()
+    return {
+        "python": f"{platform.python_implementation()} {major}.{minor}",
+        "platform": f"{platform.system()} {platform.machine()}",
+    }
+
+
+def load_baseline(path: Path) -> tuple[dict[str, str], dict[str, dict]]:
+    if not path.exists():
+        return environment(), {}
+    data = json.loads(path.read_text())
+    return data.get("environment", {}), data["results"]
+
+
+def save_baseline(path: Path, results: dict[str, Result]):
+    data = {
+        "environment": environment(),
+        "results": {name: asdict(result) for name, result in results.items()},
+    }
+    path.write_text(json.dumps(data, indent=2) + "\n")
+
+
+def baseline_results(baseline: dict[str, dict]) -> dict[str, Result]:
+    return {name: Result(**result) for name, result in baseline.items()}
+
+
+def format_ns(ns: float) -> str:
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f} ms"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.2f} us"
+    return f"{ns:.0f} ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Engine micro-benchmarks with baseline regression checks"
+    )
+    parser.add_argument("-k", "--filter", help="Only run cases containing this text")
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument(
+        "-p",
+        "--processes",
+        type=int,
+        default=3,
+        help="Fresh interpreters to run each case in (best result wins)",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Fail when a case is this much slower than its baseline (0.25 = 25%%)",
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="Record these results as the baseline"
+    )
+    args = parser.parse_args()
+
+    recorded_on, baseline = load_baseline(args.baseline)
+    comparable = recorded_on == environment()
+    if not args.baseline.exists() and not args.save:
+        print(f"No baseline at {args.baseline}; record one first with --save.\n")
+    elif not comparable:
+        print(
+            f"Baseline was recorded on {', '.join(recorded_on.values()) or 'unknown'}, "
+            f"not {', '.join(environment().values())}; "
+            "differences are shown but not checked. Re-record it with --save.\n"
+        )
+    names = [name for name in CASES if not args.filter or args.filter in name]
+    results = run_processes(names, args.repeat, args.processes)
+    regressions = []
+    print(f"{'case':<28}{'per op':>12}{'baseline':>12}{'change':>9}")
+    for name, result in results.items():
+        line = f"{name:<28}{format_ns(result.ns_per_op):>12}"
+        if name in baseline:
+            previous = baseline[name]["ns_per_op"]
+            change = result.ns_per_op / previous - 1
+            line += f"{format_ns(previous):>12}{change:>+9.0%}"
+            if change > args.threshold:
+                regressions.append(name)
+                line += "  SLOWER"
+        print(line)
+
+    if args.save:
+        kept = baseline_results(baseline) if comparable else {}
+        save_baseline(args.baseline, {**kept, **results})
+        print(f"\nBaseline saved to {args.baseline}")
+    elif regressions and comparable:
+        print(
+            f"\n{len(regressions)} case(s) slower than baseline by more than "
+            f"{args.threshold:.0%}: {', '.join(regressions)}"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+import json
+import time
+
+from websockets.asyncio.client import connect
+
+from blackjack import Game
+from perf.bench_api import free_port, start_server
+from protocol import ACTIONS
+from strategy import get_optimal_play
+
+
+async def play(url: str, num_hands: int) -> tuple[dict, int]:
+    async with connect(url) as websocket:
+        state = json.loads(await websocket.recv())["state"]
+        actions = 0
+        while state["hands_played"] < num_hands or state["actions"] != ["deal"]:
+            action = state["optimal"] or "deal"
+            await websocket.send(json.dumps({"action": action}))
+            message = json.loads(await websocket.recv())
+            if "error" in message:
+                raise RuntimeError(message["error"])
+            state.update(message["diff"])
+            actions += 1
+        return state, actions
+
+
+def replay(seed: int, num_hands: int) -> Game:
+    game = Game(seed=seed)
+    while game.stats.hands_played < num_hands:
+        game.deal()
+        while game.round_active and game.current_hand:
+            ACTIONS[get_optimal_play(game.current_hand, game.dealer_hand)](game)
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimal-strategy WebSocket bot")
+    parser.add_argument("-n", "--num-hands", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--url", help="WebSocket URL of a running server (default: start one)"
+    )
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if not url:
+        server = start_server(free_port())
+        url = f"ws://127.0.0.1:{server.config.port}/ws"
+
+    try:
+        started = time.perf_counter()
+        state, actions = asyncio.run(play(f"{url}?seed={args.seed}", args.num_hands))
+        elapsed = time.perf_counter() - started
+    finally:
+        if server:
+            server.should_exit = True
+
+    expected = replay(args.seed, state["hands_played"]).stats
+    print(f"{state['hands_played']} hands, {actions} actions in {elapsed:.2f}s")
+    print(f"Throughput: {state['hands_played'] / elapsed:,.0f} hands/s")
+    print(f"Balance:    {state['balance']:+.1f} (local replay {expected.balance:+.1f})")
+
+
+if __name__ == "__main__":
+    main()
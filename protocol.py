@@ -0,0 +1,55 @@
+import json
+from collections.abc import Callable
+
+from blackjack import Game
+from llm import available_actions
+from strategy import get_optimal_play
+
+ACTIONS: dict[str, Callable[[Game], None]] = {
+    "deal": Game.deal,
+    "hit": Game.hit,
+    "stand": Game.stand,
+    "double": Game.double_down,
+    "split": Game.split,
+    "surrender": Game.surrender,
+}
+
+
+def legal_actions(game: Game) -> list[str]:
+    if game.round_active and game.current_hand:
+        return available_actions(game.current_hand)
+    return ["deal"]
+
+
+def game_state(game: Game) -> dict:
+    hand = game.current_hand if game.round_active else None
+    dealer = game.dealer_hand
+    dealer_cards = dealer.cards[:1] if game.round_active else dealer.cards
+    return {
+        "dealer": [str(card) for card in dealer_cards],
+        "dealer_value": None if game.round_active else dealer.value,
+        "hands": [[str(card) for card in h.cards] for h in game.player_hands],
+        "values": [h.value for h in game.player_hands],
+        "current": game.current_hand_index if hand else None,
+        "actions": legal_actions(game),
+        "optimal": get_optimal_play(hand, dealer) if hand else None,
+        "results": [result.value for _, result in game.round_results],
+        "balance": game.stats.balance,
+        "hands_played": game.stats.hands_played,
+    }
+
+
+def state_diff(old: dict, new: dict) -> dict:
+    return {key: value for key, value in new.items() if old.get(key) != value}
+
+
+def encode(message: dict) -> str:
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+def parse_action(text: str) -> str | None:
+    try:
+        message = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    return message.get("action") if isinstance(message, dict) else None
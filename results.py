@@ -0,0 +1,165 @@
+import argparse
+import csv
+import time
+from collections.abc import Iterable
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+from ev import EV_FIELDS, iter_annotated
+
+ACTIONS = ("none", "hit", "stand", "double", "split", "surrender")
+
+ACTION_COLUMNS = ("action", "optimal_action")
+
+CATEGORY_COLUMNS = ("strategy", "player_cards", "dealer_upcard", "result")
+
+INTEGER_COLUMNS = {
+    "hand_id": np.int32,
+    "seed": np.int64,
+    "decision_num": np.int16,
+    "player_value": np.int8,
+}
+
+FLOAT_COLUMNS = ("balance_change", *EV_FIELDS)
+
+METRIC_COLUMNS = ("latency_ms", "input_tokens", "output_tokens", "retries")
+
+ACTION_LABELS = np.array(ACTIONS)
+
+ACTION_INDEX = {action: code for code, action in enumerate(ACTIONS)}
+
+CHUNK_ROWS = 1 << 16
+
+Columns = dict[str, np.ndarray]
+
+
+def parse_float(value) -> float:
+    return np.nan if value is None or value == "" else float(value)
+
+
+def sorted_categories(
+    labels: dict[str, int], codes: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    categories = np.array(list(labels), dtype=str)
+    order = np.argsort(categories)
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    return rank[codes].astype(np.min_scalar_type(len(order))), categories[order]
+
+
+def encode_rows(rows: Iterable[dict], chunk_rows: int = CHUNK_ROWS) -> Columns:
+    rows = iter(rows)
+    chunk = list(islice(rows, chunk_rows))
+    has_ev = bool(chunk) and all(name in chunk[0] for name in EV_FIELDS)
+    has_metrics = bool(chunk) and "latency_ms" in chunk[0]
+    floats = FLOAT_COLUMNS if has_ev else FLOAT_COLUMNS[:1]
+    if has_metrics:
+        floats = (*floats, *METRIC_COLUMNS)
+    categories = (*CATEGORY_COLUMNS, "retry_error") if has_metrics else CATEGORY_COLUMNS
+
+    parts: dict[str, list[np.ndarray]] = {
+        **{name: [np.empty(0, dtype)] for name, dtype in INTEGER_COLUMNS.items()},
+        **{name: [np.empty(0, np.float32)] for name in floats},
+        **{f"{name}_codes": [np.empty(0, np.uint8)] for name in ACTION_COLUMNS},
+        **{name: [np.empty(0, np.int64)] for name in categories},
+    }
+    labels: dict[str, dict[str, int]] = {name: {} for name in categories}
+    while chunk:
+        for name, dtype in INTEGER_COLUMNS.items():
+            parts[name].append(np.array([int(row[name]) for row in chunk], dtype))
+        for name in floats:
+            values = [parse_float(row[name]) for row in chunk]
+            parts[name].append(np.array(values, dtype=np.float32))
+        for name in ACTION_COLUMNS:
+            codes = [ACTION_INDEX[row[name]] for row in chunk]
+            parts[f"{name}_codes"].append(np.array(codes, dtype=np.uint8))
+        for name in categories:
+            seen = labels[name]
+            codes = [seen.setdefault(row[name] or "", len(seen)) for row in chunk]
+            parts[name].append(np.array(codes, dtype=np.int64))
+        chunk = list(islice(rows, chunk_rows))
+
+    arrays: Columns = {}
+    for name, chunks in parts.items():
+        values = np.concatenate(chunks)
+        if name in labels:
+            codes, names = sorted_categories(labels[name], values)
+            arrays[f"{name}_codes"] = codes
+            arrays[f"{name}_categories"] = names
+        else:
+            arrays[name] = values
+    return arrays
+
+
+def write_columns(rows: Iterable[dict], path: Path):
+    tmp = path.with_suffix(".tmp.npz")
+    np.savez_compressed(tmp, **encode_rows(rows))
+    tmp.replace(path)
+
+
+def decode(arrays: Columns) -> Columns:
+    columns = {
+        name: arrays[name]
+        for name in (*INTEGER_COLUMNS, *FLOAT_COLUMNS, *METRIC_COLUMNS)
+        if name in arrays
+    }
+    for name in ACTION_COLUMNS:
+        columns[name] = ACTION_LABELS[arrays[f"{name}_codes"]]
+    for name in (*CATEGORY_COLUMNS, "retry_error"):
+        if f"{name}_codes" in arrays:
+            columns[name] = arrays[f"{name}_categories"][arrays[f"{name}_codes"]]
+    return columns
+
+
+def read_columns(path: Path) -> Columns:
+    with np.load(path) as data:
+        return decode(dict(data))
+
+
+def to_rows(columns: Columns, mask: np.ndarray | None = None) -> list[dict]:
+    selected = {
+        name: (values if mask is None else values[mask]).tolist()
+        for name, values in columns.items()
+    }
+    return [dict(zip(selected, row)) for row in zip(*selected.values())]
+
+
+def columnar_path(csv_path: Path) -> Path:
+    return csv_path.with_suffix(".npz")
+
+
+def convert_csv(csv_path: Path, ev: bool = False) -> Path:
+    path = columnar_path(csv_path)
+    with open(csv_path, newline="") as f:
+        reader = csv.DictReader(f)
+        rows: Iterable[dict] = reader
+        if ev and "ev_lost" not in (reader.fieldnames or []):
+            rows = iter_annotated(reader)
+        write_columns(rows, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert benchmark CSVs to compressed columnar .npz files"
+    )
+    parser.add_argument(
+        "inputs", nargs="*", type=Path, help="CSV files (default: benchmarks/**/*.csv)"
+    )
+    parser.add_argument(
+        "--ev", action="store_true", help="Add ev, best_ev and ev_lost columns"
+    )
+    args = parser.parse_args()
+
+    for csv_path in args.inputs or sorted(Path("benchmarks").rglob("*.csv")):
+        started = time.perf_counter()
+        path = convert_csv(csv_path, args.ev)
+        elapsed = time.perf_counter() - started
+        size = path.stat().st_size / csv_path.stat().st_size
+        print(f"{csv_path} -> {path} ({size:.0%} of CSV size, {elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
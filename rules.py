@@ -0,0 +1,124 @@
+import hashlib
+import json
+from dataclasses import asdict, dataclass, fields, replace
+from functools import cache, cached_property
+from typing import Self
+
+BLACKJACK_PAYOUTS = {1.5: "3:2", 1.2: "6:5", 1.0: "1:1", 2.0: "2:1"}
+
+PAYOUT_RATIOS = {label: ratio for ratio, label in BLACKJACK_PAYOUTS.items()}
+
+
+@dataclass(frozen=True)
+class Rules:
+    num_decks: int = 6
+    hits_soft_17: bool = False
+    double_after_split: bool = True
+    surrender: bool = True
+    max_split_hands: int = 2
+    peek: bool = True
+    blackjack_payout: float = 1.5
+
+    def __post_init__(self):
+        if self.num_decks < 1:
+            raise ValueError(f"num_decks must be at least 1, got {self.num_decks}")
+        if self.max_split_hands < 2:
+            raise ValueError(
+                f"max_split_hands must be at least 2, got {self.max_split_hands}"
+            )
+        if self.blackjack_payout <= 0:
+            raise ValueError(
+                f"blackjack_payout must be positive, got {self.blackjack_payout}"
+            )
+
+    @cached_property
+    def key(self) -> str:
+        encoded = json.dumps(asdict(self), sort_keys=True).encode()
+        return hashlib.sha256(encoded).hexdigest()[:16]
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def describe(self) -> str:
+        payout = BLACKJACK_PAYOUTS.get(self.blackjack_payout, self.blackjack_payout)
+        parts = [
+            f"{self.num_decks} deck{'s' if self.num_decks != 1 else ''}",
+            "dealer hits soft 17" if self.hits_soft_17 else "dealer stands on soft 17",
+            "double after split allowed"
+            if self.double_after_split
+            else "no double after split",
+            "late surrender allowed" if self.surrender else "no surrender",
+            f"split to {self.max_split_hands} hands"
+            if self.max_split_hands > 2
+            else "no re-splitting",
+            "dealer peeks for blackjack" if self.peek else "dealer does not peek",
+            f"blackjack pays {payout}",
+        ]
+        return ", ".join(parts)
+
+    @classmethod
+    def from_description(cls, text: str) -> Self:
+        decks, h17, das, surrender, splits, peek, payout = text.split(", ")
+        payout = payout.removeprefix("blackjack pays ")
+        return cls(
+            num_decks=int(decks.split()[0]),
+            hits_soft_17=h17 == "dealer hits soft 17",
+            double_after_split=das == "double after split allowed",
+            surrender=surrender == "late surrender allowed",
+            max_split_hands=int(splits.split()[2]) if splits.startswith("split") else 2,
+            peek=peek == "dealer peeks for blackjack",
+            blackjack_payout=PAYOUT_RATIOS.get(payout) or float(payout),
+        )
+
+
+HOUSE_RULES = Rules()
+
+RULESETS = {
+    "house": HOUSE_RULES,
+    "h17": Rules(hits_soft_17=True),
+    "vegas": Rules(num_decks=6, hits_soft_17=True, max_split_hands=4),
+    "double-deck": Rules(num_decks=2, hits_soft_17=True, surrender=False),
+    "single-deck": Rules(
+        num_decks=1,
+        hits_soft_17=True,
+        double_after_split=False,
+        surrender=False,
+        blackjack_payout=1.2,
+    ),
+    "european": Rules(peek=False, surrender=False),
+}
+
+TRUE_VALUES = {"1", "true", "yes", "on"}
+FALSE_VALUES = {"0", "false", "no", "off"}
+
+
+def parse_value(kind: type, value: str):
+    if kind is bool:
+        if value.lower() in TRUE_VALUES:
+            return True
+        if value.lower() in FALSE_VALUES:
+            return False
+        raise ValueError(f"Expected a boolean, got {value!r}")
+    return kind(value)
+
+
+def parse_rules(spec: str) -> Rules:
+    name, _, overrides = spec.partition(",")
+    if name not in RULESETS:
+        raise ValueError(
+            f"Unknown rule set: {name} (choose from {', '.join(RULESETS)})"
+        )
+    rules = RULESETS[name]
+    types = {field.name: type(getattr(rules, field.name)) for field in fields(Rules)}
+    for override in filter(None, overrides.split(",")):
+        key, _, value = override.partition("=")
+        if key not in types:
+            raise ValueError(f"Unknown rule: {key}")
+        rules = replace(rules, **{key: parse_value(types[key], value)})
+    return rules
+
+
+@cache
+def label_rules(label: str) -> Rules:
+    _, _, spec = label.partition("@")
+    return parse_rules(spec) if spec else HOUSE_RULES
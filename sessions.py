@@ -0,0 +1,159 @@
+import os
+import pickle
+import secrets
+import sqlite3
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Protocol
+
+from blackjack import Game
+
+SESSION_COOKIE = "llm21_session"
+
+SESSION_TTL = 60 * 60
+
+MAX_SESSIONS = 10_000
+
+PURGE_INTERVAL = 256
+
+
+def new_session_id() -> str:
+    return secrets.token_urlsafe(16)
+
+
+class SessionStore(Protocol):
+    def get(self, session_id: str) -> Game | None: ...
+
+    def put(self, session_id: str, game: Game): ...
+
+    def touch(self, session_id: str): ...
+
+
+class MemorySessionStore:
+    def __init__(
+        self,
+        ttl: float = SESSION_TTL,
+        max_sessions: int = MAX_SESSIONS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self.sessions: OrderedDict[str, tuple[float, Game]] = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def get(self, session_id: str) -> Game | None:
+        entry = self.sessions.get(session_id)
+        if entry is None:
+            return None
+        expires, game = entry
+        if expires < self.clock():
+            del self.sessions[session_id]
+            self.evictions += 1
+            return None
+        return game
+
+    def put(self, session_id: str, game: Game):
+        now = self.clock()
+        self.sessions[session_id] = (now + self.ttl, game)
+        self.sessions.move_to_end(session_id)
+        self.evict(now)
+
+    def touch(self, session_id: str):
+        entry = self.sessions.get(session_id)
+        if entry is not None:
+            self.sessions[session_id] = (self.clock() + self.ttl, entry[1])
+            self.sessions.move_to_end(session_id)
+
+    def evict(self, now: float):
+        while self.sessions:
+            session_id, (expires, _) = next(iter(self.sessions.items()))
+            if expires >= now and len(self.sessions) <= self.max_sessions:
+                break
+            del self.sessions[session_id]
+            self.evictions += 1
+
+
+class SQLiteSessionStore:
+    def __init__(
+        self,
+        path: str,
+        ttl: float = SESSION_TTL,
+        max_sessions: int = MAX_SESSIONS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self.puts = 0
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, expires REAL NOT NULL, game BLOB NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires)"
+        )
+        self.conn.commit()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def get(self, session_id: str) -> Game | None:
+        row = self.conn.execute(
+            "SELECT game FROM sessions WHERE id = ? AND expires >= ?",
+            (session_id, self.clock()),
+        ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def put(self, session_id: str, game: Game):
+        now = self.clock()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sessions (id, expires, game) VALUES (?, ?, ?)",
+            (session_id, now + self.ttl, pickle.dumps(game)),
+        )
+        self.puts += 1
+        if self.puts % PURGE_INTERVAL == 0:
+            self.evict(now)
+        self.conn.commit()
+
+    def touch(self, session_id: str):
+        self.conn.execute(
+            "UPDATE sessions SET expires = ? WHERE id = ?",
+            (self.clock() + self.ttl, session_id),
+        )
+        self.conn.commit()
+
+    def evict(self, now: float):
+        self.conn.execute("DELETE FROM sessions WHERE expires < ?", (now,))
+        self.conn.execute(
+            "DELETE FROM sessions WHERE id IN ("
+            "SELECT id FROM sessions ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,),
+        )
+
+    def close(self):
+        self.conn.close()
+
+
+_session_store: SessionStore | None = None
+
+
+def configure_session_store(store: SessionStore | None):
+    global _session_store
+    _session_store = store
+
+
+def get_session_store() -> SessionStore:
+    global _session_store
+    if _session_store is None:
+        path = os.getenv("SESSION_STORE", "")
+        _session_store = SQLiteSessionStore(path) if path else MemorySessionStore()
+    return _session_store
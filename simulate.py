@@ -0,0 +1,296 @@
+import argparse
+import random
+import time
+from collections.abc import Iterable
+from dataclasses import replace
+from functools import cache
+
+import numpy as np
+
+from blackjack import DECK_CODES, Game, Rank
+from rules import HOUSE_RULES
+from strategy import decision_index, get_optimal_play
+
+STAND, HIT, DOUBLE, SPLIT, SURRENDER = range(5)
+
+ACTION_CODES = {
+    "stand": STAND,
+    "hit": HIT,
+    "double": DOUBLE,
+    "split": SPLIT,
+    "surrender": SURRENDER,
+}
+
+MAX_CARDS = 20
+
+DEALER, OVERFLOW = 2, 3
+
+CODE_HARD = np.array(
+    [rank.points if rank != Rank.ACE else 1 for rank in Rank] * 4, dtype=np.int8
+)
+
+
+def build_action_table(index: dict) -> np.ndarray:
+    table = np.empty((32, 2, 10, 2, 2), dtype=np.int8)
+    for key in np.ndindex(table.shape):
+        value, soft, dealer_idx, can_double, can_surrender = key
+        kind = "soft" if soft and ("soft", value, 0, True, True) in index else "hard"
+        flags = (bool(can_double), bool(can_surrender))
+        table[key] = ACTION_CODES[index[kind, value, dealer_idx, *flags]]
+    return table
+
+
+def build_pair_table(index: dict) -> np.ndarray:
+    table = np.empty((11, 10), dtype=np.int8)
+    for hard in range(1, 11):
+        total = 11 if hard == 1 else hard
+        table[hard] = [
+            ACTION_CODES[index["pair", total, dealer_idx, True, True]]
+            for dealer_idx in range(10)
+        ]
+    return table
+
+
+@cache
+def decision_tables(num_decks: int = 6) -> tuple[np.ndarray, np.ndarray]:
+    index = decision_index(replace(HOUSE_RULES, num_decks=num_decks))
+    return build_action_table(index), build_pair_table(index)
+
+
+def top_codes(seed: int, num_decks: int = 6, count: int = MAX_CARDS) -> bytes:
+    deck = bytearray(DECK_CODES * num_decks)
+    randbelow = random.Random(seed)._randbelow
+    top = bytearray(count)
+    i = len(deck) - 1
+    for k in range(count):
+        j = randbelow(i + 1)
+        deck[i], deck[j] = deck[j], deck[i]
+        top[k] = deck[i]
+        i -= 1
+    return bytes(top)
+
+
+def hand_value(hard: np.ndarray, aces: np.ndarray) -> np.ndarray:
+    return np.where(aces & (hard <= 11), hard + 10, hard)
+
+
+def simulate_batch(
+    seeds: np.ndarray, num_decks: int = 6
+) -> tuple[np.ndarray, np.ndarray]:
+    n = len(seeds)
+    codes = np.frombuffer(
+        b"".join(top_codes(int(seed), num_decks) for seed in seeds), dtype=np.uint8
+    ).reshape(n, MAX_CARDS)
+    cards = CODE_HARD[codes].astype(np.int16)
+    action_table, pair_table = decision_tables(num_decks)
+    rows = np.arange(n)
+
+    hard = np.zeros((n, 2), dtype=np.int16)
+    aces = np.zeros((n, 2), dtype=bool)
+    count = np.zeros((n, 2), dtype=np.int16)
+    doubled = np.zeros((n, 2), dtype=bool)
+    surrendered = np.zeros(n, dtype=bool)
+    split = np.zeros(n, dtype=bool)
+
+    first, up, second, hole = cards[:, 0], cards[:, 1], cards[:, 2], cards[:, 3]
+    hard[:, 0] = first + second
+    aces[:, 0] = (first == 1) | (second == 1)
+    count[:, 0] = 2
+    dealer_hard = up + hole
+    dealer_aces = (up == 1) | (hole == 1)
+    dealer_idx = np.where(up == 1, 9, up - 2)
+    ptr = np.full(n, 4, dtype=np.int16)
+
+    player_bj = hand_value(hard[:, 0], aces[:, 0]) == 21
+    dealer_bj = hand_value(dealer_hard, dealer_aces) == 21
+    natural = player_bj | dealer_bj
+    cur = np.where(natural, DEALER, 0).astype(np.int8)
+
+    def draw(r: np.ndarray, h: np.ndarray | int):
+        card = cards[r, ptr[r]]
+        ptr[r] += 1
+        hard[r, h] += card
+        aces[r, h] |= card == 1
+        count[r, h] += 1
+        cur[r[ptr[r] >= MAX_CARDS]] = OVERFLOW
+
+    def advance(r: np.ndarray):
+        cur[r] = np.where((cur[r] == 0) & split[r], 1, DEALER)
+
+    while True:
+        r = rows[cur < DEALER]
+        if not len(r):
+            break
+        h = cur[r]
+        hh, ha, hn = hard[r, h], aces[r, h], count[r, h]
+        value = hand_value(hh, ha)
+        soft = (ha & (hh <= 11)).view(np.int8)
+        two = hn == 2
+        unsplit = two & ~split[r]
+        action = action_table[
+            value, soft, dealer_idx[r], two.view(np.int8), unsplit.view(np.int8)
+        ]
+        pair = unsplit & (first[r] == second[r])
+        action = np.where(pair, pair_table[first[r], dealer_idx[r]], action)
+
+        stand = r[action == STAND]
+        advance(stand)
+
+        surrender = r[action == SURRENDER]
+        surrendered[surrender] = True
+        advance(surrender)
+
+        hit = action == HIT
+        draw(r[hit], h[hit])
+        busted = r[hit][hand_value(hard[r[hit], h[hit]], aces[r[hit], h[hit]]) > 21]
+        busted = busted[cur[busted] < DEALER]
+        advance(busted)
+
+        dbl = action == DOUBLE
+        doubled[r[dbl], h[dbl]] = True
+        draw(r[dbl], h[dbl])
+        advance(r[dbl][cur[r[dbl]] < DEALER])
+
+        s = r[action == SPLIT]
+        split[s] = True
+        hard[s, 0] = first[s]
+        aces[s, 0] = first[s] == 1
+        count[s, 0] = 1
+        hard[s, 1] = second[s]
+        aces[s, 1] = second[s] == 1
+        count[s, 1] = 1
+        draw(s, 0)
+        s = s[cur[s] != OVERFLOW]
+        draw(s, 1)
+        split_aces = s[(first[s] == 1) & (cur[s] != OVERFLOW)]
+        cur[split_aces] = DEALER
+
+    while True:
+        r = rows[
+            (cur == DEALER) & ~natural & (hand_value(dealer_hard, dealer_aces) < 17)
+        ]
+        if not len(r):
+            break
+        card = cards[r, ptr[r]]
+        ptr[r] += 1
+        dealer_hard[r] += card
+        dealer_aces[r] |= card == 1
+        cur[r[ptr[r] >= MAX_CARDS]] = OVERFLOW
+
+    dealer_value = hand_value(dealer_hard, dealer_aces)
+    balance = np.zeros(n, dtype=np.float64)
+    for h in (0, 1):
+        value = hand_value(hard[:, h], aces[:, h])
+        mult = np.where(doubled[:, h], 2.0, 1.0)
+        outcome = np.where(
+            value > 21,
+            -1.0,
+            np.where(
+                dealer_value > 21,
+                1.0,
+                np.sign(value - dealer_value).astype(np.float64),
+            ),
+        )
+        played = split if h else np.ones(n, dtype=bool)
+        balance += np.where(played, outcome * mult, 0.0)
+
+    balance = np.where(surrendered, -0.5, balance)
+    balance = np.where(
+        natural,
+        np.where(dealer_bj, np.where(player_bj, 0.0, -1.0), 1.5),
+        balance,
+    )
+    return balance, cur == OVERFLOW
+
+
+def play_with_game(seed: int, num_decks: int = 6) -> float:
+    game = Game(num_decks, seed=seed)
+    game.deal()
+    while game.round_active and game.current_hand:
+        match get_optimal_play(game.current_hand, game.dealer_hand):
+            case "hit":
+                game.hit()
+            case "stand":
+                game.stand()
+            case "double":
+                game.double_down()
+            case "split":
+                game.split()
+            case "surrender":
+                game.surrender()
+    return game.stats.balance
+
+
+def simulate_optimal(
+    num_hands: int | None = None,
+    seeds: Iterable[int] | None = None,
+    num_decks: int = 6,
+    batch_size: int = 100_000,
+) -> np.ndarray:
+    if seeds is None:
+        if num_hands is None:
+            raise ValueError("num_hands or seeds must be given")
+        seeds = np.arange(num_hands, dtype=np.int64)
+    seeds = np.asarray(list(seeds) if not isinstance(seeds, np.ndarray) else seeds)
+
+    balances = np.empty(len(seeds), dtype=np.float64)
+    for lo in range(0, len(seeds), batch_size):
+        batch = seeds[lo : lo + batch_size]
+        balance, overflow = simulate_batch(batch, num_decks)
+        for i in np.flatnonzero(overflow):
+            balance[i] = play_with_game(int(batch[i]), num_decks)
+        balances[lo : lo + batch_size] = balance
+    return balances
+
+
+def verify_against_game(seeds: Iterable[int], num_decks: int = 6) -> list[int]:
+    seeds = list(seeds)
+    balances = simulate_optimal(seeds=seeds, num_decks=num_decks)
+    return [
+        seed
+        for seed, balance in zip(seeds, balances)
+        if play_with_game(seed, num_decks) != balance
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Vectorized optimal strategy simulator"
+    )
+    parser.add_argument(
+        "-n", "--num-hands", type=int, default=1_000_000, help="Number of hands to play"
+    )
+    parser.add_argument("--start", type=int, default=0, help="Starting hand index")
+    parser.add_argument(
+        "--verify",
+        type=int,
+        default=0,
+        help="Cross-check this many hands against the Game engine",
+    )
+    args = parser.parse_args()
+
+    seeds = np.arange(args.start, args.start + args.num_hands, dtype=np.int64)
+
+    started = time.perf_counter()
+    balances = simulate_optimal(seeds=seeds)
+    elapsed = time.perf_counter() - started
+
+    mean = balances.mean()
+    stderr = balances.std(ddof=1) / np.sqrt(len(balances)) if len(balances) > 1 else 0.0
+
+    print(f"Hands played: {len(balances)}")
+    print(f"Total balance: {balances.sum():+.2f}")
+    print(f"Avg per hand: {mean:+.5f} (±{1.96 * stderr:.5f})")
+    print(f"Elapsed: {elapsed:.2f}s ({len(balances) / elapsed:,.0f} hands/s)")
+
+    if args.verify:
+        mismatches = verify_against_game(seeds[: args.verify].tolist())
+        print(
+            f"Verified {min(args.verify, len(seeds))} hands against Game: {len(mismatches)} mismatches"
+        )
+        if mismatches:
+            print(f"  Mismatched seeds: {mismatches[:20]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,8 @@
+from functools import cache
+
 from blackjack import Hand, Rank
+from charts import load_index
+from rules import HOUSE_RULES, Rules
 
 HARD_STRATEGY = {
     21: "SSSSSSSSSS",
@@ -64,54 +68,86 @@ def get_dealer_value(hand: Hand) -> int:
 
 
 def is_soft(hand: Hand) -> bool:
-    total = sum(card.value for card in hand.cards)
-    aces = sum(1 for card in hand.cards if card.rank == Rank.ACE)
-    while total > 21 and aces:
-        total -= 10
-        aces -= 1
-    has_active_ace = any(card.rank == Rank.ACE for card in hand.cards) and total <= 21
-    base_total = sum(1 if card.rank == Rank.ACE else card.value for card in hand.cards)
-    return has_active_ace and base_total + 10 <= 21
+    return hand.is_soft
 
 
 def is_pair(hand: Hand) -> bool:
     return len(hand.cards) == 2 and hand.cards[0].value == hand.cards[1].value
 
 
-def get_optimal_play(player_hand: Hand, dealer_hand: Hand) -> str:
-    dealer_val = get_dealer_value(dealer_hand)
-    dealer_idx = DEALER_INDEX.get(dealer_val, 9)
-
-    if is_pair(player_hand) and not player_hand.is_split:
-        rank = player_hand.cards[0].rank
-        if rank in (Rank.TEN, Rank.JACK, Rank.QUEEN, Rank.KING):
-            rank = Rank.TEN
-        if rank in PAIR_STRATEGY:
-            action = PAIR_STRATEGY[rank][dealer_idx]
-            return ACTION_MAP[action]
-
-    if is_soft(player_hand):
-        value = player_hand.value
-        if value in SOFT_STRATEGY:
-            action = SOFT_STRATEGY[value][dealer_idx]
-            if action == "D" and not player_hand.can_double:
-                action = "H" if value <= 17 else "S"
-            return ACTION_MAP.get(action, action)
-
-    value = player_hand.value
-    if value in HARD_STRATEGY:
-        action = HARD_STRATEGY[value][dealer_idx]
-        if action == "D" and not player_hand.can_double:
+PAIR_RANKS = {rank.points: rank for rank in PAIR_STRATEGY}
+
+
+def resolve_play(
+    kind: str, total: int, dealer_idx: int, can_double: bool, can_surrender: bool
+) -> str:
+    if kind == "pair":
+        return ACTION_MAP[PAIR_STRATEGY[PAIR_RANKS[total]][dealer_idx]]
+
+    if kind == "soft" and total in SOFT_STRATEGY:
+        action = SOFT_STRATEGY[total][dealer_idx]
+        if action == "D" and not can_double:
+            action = "H" if total <= 17 else "S"
+        return ACTION_MAP[action]
+
+    if total in HARD_STRATEGY:
+        action = HARD_STRATEGY[total][dealer_idx]
+        if action == "D" and not can_double:
             action = "H"
-        if action == "R" and not player_hand.can_surrender:
+        if action == "R" and not can_surrender:
             action = "H"
-        return ACTION_MAP.get(action, action)
+        return ACTION_MAP[action]
 
-    if value >= 17:
+    if total >= 17:
         return "stand"
     return "hit"
 
 
+def build_decision_index() -> dict[tuple[str, int, int, bool, bool], str]:
+    totals = {"pair": PAIR_RANKS, "soft": range(11, 22), "hard": range(32)}
+    return {
+        (kind, total, dealer_idx, can_double, can_surrender): resolve_play(
+            kind, total, dealer_idx, can_double, can_surrender
+        )
+        for kind, kind_totals in totals.items()
+        for total in kind_totals
+        for dealer_idx in DEALER_INDEX.values()
+        for can_double in (False, True)
+        for can_surrender in (False, True)
+    }
+
+
+DECISION_INDEX = build_decision_index()
+
+
+@cache
+def decision_index(rules: Rules = HOUSE_RULES) -> dict:
+    if rules == HOUSE_RULES:
+        return DECISION_INDEX
+    return load_index(rules)
+
+
+def hand_state(hand: Hand) -> tuple[str, int]:
+    if hand.can_split:
+        return "pair", hand.cards[0].value
+    return "soft" if hand.is_soft else "hard", hand.value
+
+
+def get_optimal_play(
+    player_hand: Hand, dealer_hand: Hand, rules: Rules | None = None
+) -> str:
+    rules = rules or player_hand.rules
+    index = DECISION_INDEX if rules is HOUSE_RULES else decision_index(rules)
+    kind, total = hand_state(player_hand)
+    return index[
+        kind,
+        total,
+        DEALER_INDEX[get_dealer_value(dealer_hand)],
+        player_hand.can_double,
+        player_hand.can_surrender,
+    ]
+
+
 def evaluate_decision(player_hand: Hand, dealer_hand: Hand, decision: str) -> bool:
     optimal = get_optimal_play(player_hand, dealer_hand)
     return decision.lower() == optimal.lower()
@@ -0,0 +1,137 @@
+import asyncio
+import random
+import re
+from copy import copy
+from dataclasses import dataclass, fields, replace
+from types import SimpleNamespace
+
+from blackjack import CARDS_BY_LABEL, Hand
+from rules import HOUSE_RULES, Rules
+from strategy import get_optimal_play
+
+
+@dataclass(frozen=True)
+class StubProfile:
+    latency: float = 0.05
+    jitter: float = 0.25
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    accuracy: float = 1.0
+    seed: int | None = None
+
+
+PROFILES = {
+    "optimal": StubProfile(),
+    "instant": StubProfile(latency=0.0, jitter=0.0),
+    "noisy": StubProfile(accuracy=0.85),
+    "slow": StubProfile(latency=1.0, jitter=0.5),
+    "flaky": StubProfile(error_rate=0.05, timeout_rate=0.01),
+    "throttled": StubProfile(latency=0.2, error_rate=0.3),
+}
+
+RULES_PATTERN = re.compile(r"House rules: (.+)")
+HAND_PATTERN = re.compile(r"Your hand: (.+) \(\d+\)")
+DEALER_PATTERN = re.compile(r"Dealer shows: (\S+)")
+ACTIONS_PATTERN = re.compile(r"Available actions: (.+)")
+POSITION_SPLIT = re.compile(r"^Position \d+:$", re.MULTILINE)
+
+
+class StubRateLimitError(Exception):
+    status_code = 429
+
+
+class StubTimeoutError(TimeoutError):
+    pass
+
+
+def parse_profile(spec: str) -> StubProfile:
+    name, _, overrides = spec.partition(",")
+    if name not in PROFILES:
+        raise ValueError(
+            f"Unknown stub profile: {name} (choose from {', '.join(PROFILES)})"
+        )
+    profile = PROFILES[name]
+    options = {field.name for field in fields(StubProfile)}
+    for override in filter(None, overrides.split(",")):
+        key, _, value = override.partition("=")
+        if key not in options:
+            raise ValueError(f"Unknown stub profile option: {key}")
+        profile = replace(
+            profile, **{key: int(value) if key == "seed" else float(value)}
+        )
+    return profile
+
+
+def parse_position(prompt: str) -> tuple[Hand, Hand, list[str]]:
+    hand_match = HAND_PATTERN.search(prompt)
+    dealer_match = DEALER_PATTERN.search(prompt)
+    actions_match = ACTIONS_PATTERN.search(prompt)
+    if not (hand_match and dealer_match and actions_match):
+        raise ValueError("Prompt does not describe a blackjack position")
+
+    rules_match = RULES_PATTERN.search(prompt)
+    rules = Rules.from_description(rules_match.group(1)) if rules_match else HOUSE_RULES
+    cards = [CARDS_BY_LABEL[label] for label in hand_match.group(1).split()]
+    actions = [action.strip() for action in actions_match.group(1).split(",")]
+    player = Hand(cards=cards, rules=rules, can_resplit="split" in actions)
+    if len(cards) == 2:
+        player.is_split = (
+            (rules.surrender and "surrender" not in actions)
+            or (not rules.double_after_split and "double" not in actions)
+            or (cards[0].value == cards[1].value and "split" not in actions)
+        )
+    dealer = Hand(cards=[CARDS_BY_LABEL[dealer_match.group(1)]], rules=rules)
+    return player, dealer, actions
+
+
+class StubChatModel:
+    def __init__(self, profile: StubProfile):
+        self.profile = profile
+        self.rng = random.Random(profile.seed)
+        self.calls = 0
+        self.batch = False
+        self.include_raw = False
+
+    def with_structured_output(self, schema, include_raw: bool = False):
+        model = copy(self)
+        model.batch = "decisions" in schema.__annotations__
+        model.include_raw = include_raw
+        return model
+
+    def decide(self, prompt: str) -> str:
+        player, dealer, actions = parse_position(prompt)
+        optimal = get_optimal_play(player, dealer)
+        if self.rng.random() < self.profile.accuracy or len(actions) < 2:
+            return optimal
+        return self.rng.choice([action for action in actions if action != optimal])
+
+    async def ainvoke(self, prompt: str) -> dict:
+        self.calls += 1
+        profile = self.profile
+        latency = profile.latency * self.rng.lognormvariate(0, profile.jitter)
+        if latency:
+            await asyncio.sleep(latency)
+
+        roll = self.rng.random()
+        if roll < profile.error_rate:
+            raise StubRateLimitError("Stub model rate limit exceeded")
+        if roll < profile.error_rate + profile.timeout_rate:
+            raise StubTimeoutError("Stub model timed out")
+
+        if self.batch:
+            positions = POSITION_SPLIT.split(prompt)[1:]
+            parsed = {"decisions": [self.decide(position) for position in positions]}
+        else:
+            parsed = {"decision": self.decide(prompt)}
+        if not self.include_raw:
+            return parsed
+        usage = {
+            "input_tokens": len(prompt) // 4,
+            "output_tokens": len(str(parsed)) // 4,
+        }
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        return {
+            "raw": SimpleNamespace(usage_metadata=usage),
+            "parsed": parsed,
+            "parsing_error": None,
+        }
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+NULL_SPAN = nullcontext()
+
+
+class Tracer:
+    def __init__(self, name: str = "benchmark"):
+        self.events: list[dict] = [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": os.getpid(),
+                "args": {"name": name},
+            }
+        ]
+        self.tracks: dict[str, int] = {}
+
+    def track(self) -> tuple[int, int]:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        name = task.get_name() if task else threading.current_thread().name
+        pid = os.getpid()
+        tid = self.tracks.get(name)
+        if tid is None:
+            tid = self.tracks[name] = len(self.tracks) + 1
+            self.events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"name": name},
+                }
+            )
+        return pid, tid
+
+    @contextmanager
+    def span(self, name: str, **args):
+        pid, tid = self.track()
+        started = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.events.append(
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": started / 1000,
+                    "dur": (time.perf_counter_ns() - started) / 1000,
+                    "pid": pid,
+                    "tid": tid,
+                    "args": args,
+                }
+            )
+
+    def drain(self) -> list[dict]:
+        events, self.events = self.events, []
+        return events
+
+    def extend(self, events: list[dict]):
+        self.events.extend(events)
+
+    def save(self, path: Path):
+        trace = {"traceEvents": self.events, "displayTimeUnit": "ms"}
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(trace, separators=(",", ":")))
+        tmp.replace(path)
+
+
+_tracer: Tracer | None = None
+
+
+def configure_tracer(tracer: Tracer | None):
+    global _tracer
+    _tracer = tracer
+
+
+def get_tracer() -> Tracer | None:
+    return _tracer
+
+
+def span(name: str, **args):
+    if _tracer is None:
+        return NULL_SPAN
+    return _tracer.span(name, **args)
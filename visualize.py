@@ -1,11 +1,28 @@
+import argparse
 import csv
 import json
+import time
+from bisect import bisect_left
 from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from itertools import chain
 from pathlib import Path
 
+import numpy as np
+
+from ev import iter_annotated
+from results import Columns, columnar_path, read_columns, to_rows
+
 
 BENCHMARK_DIR = Path("benchmarks")
 
+STATS_CACHE_PATH = Path(".dashboard_cache.json")
+
+STATS_VERSION = 4
+
+EV_VERSION = 1
+
 MODEL_INFO = {
     "gpt-4o-mini-2024-07-18": {"name": "GPT-4o Mini", "provider": "OpenAI"},
     "gpt-5.2-2025-12-11": {"name": "GPT-5.2", "provider": "OpenAI"},
@@ -34,6 +51,12 @@ ERROR_CATEGORIES = {
     "Split": [("split", "hit"), ("split", "stand"), ("hit", "split"), ("stand", "split")],
 }
 
+HAND_VALUES = range(8, 21)
+
+UPCARDS = ("2", "3", "4", "5", "6", "7", "8", "9", "10", "A")
+
+LATENCY_BUCKETS_MS = tuple(10 ** (i / 10) for i in range(51))
+
 TENDENCY_PATTERNS = {
     "Over-double": [("stand", "double"), ("hit", "double")],
     "Under-double": [("double", "hit"), ("double", "stand")],
@@ -44,22 +67,19 @@ TENDENCY_PATTERNS = {
 }
 
 
-def load_csv(path: Path) -> list[dict]:
-    with open(path) as f:
-        return list(csv.DictReader(f))
-
+def iter_csv(path: Path) -> Iterator[dict]:
+    with open(path, newline="") as f:
+        yield from csv.DictReader(f)
 
-def get_model_stats(records: list[dict]) -> dict:
-    llm_records = [r for r in records if r["strategy"] == "llm"]
-    mistakes = [r for r in llm_records if r["action"] != r["optimal_action"]]
 
-    final_records = [r for r in llm_records if r["result"]]
-    total_balance = sum(float(r["balance_change"]) for r in final_records)
+def upcard_rank(label: str) -> str:
+    rank = label[:-1]
+    return "10" if rank in ("J", "Q", "K") else rank
 
-    mistake_types = Counter((r["optimal_action"], r["action"]) for r in mistakes)
-
-    by_value = Counter(int(r["player_value"]) for r in mistakes)
 
+def summarize_mistakes(
+    mistake_types: Counter, by_value: Counter, by_upcard: Counter
+) -> dict:
     error_counts = {}
     for cat_name, patterns in ERROR_CATEGORIES.items():
         error_counts[cat_name] = sum(mistake_types.get(p, 0) for p in patterns)
@@ -68,34 +88,297 @@ def get_model_stats(records: list[dict]) -> dict:
     for cat_name, patterns in TENDENCY_PATTERNS.items():
         tendency_counts[cat_name] = sum(mistake_types.get(p, 0) for p in patterns)
 
-    mistakes_by_value = {v: by_value.get(v, 0) for v in range(8, 21)}
-
     return {
-        "total_decisions": len(llm_records),
-        "mistakes": len(mistakes),
-        "accuracy": (1 - len(mistakes) / len(llm_records)) * 100 if llm_records else 0,
-        "balance": total_balance,
         "error_counts": error_counts,
         "tendency_counts": tendency_counts,
-        "mistakes_by_value": mistakes_by_value,
+        "mistakes_by_value": {v: by_value.get(v, 0) for v in HAND_VALUES},
+        "mistakes_by_upcard": {u: by_upcard.get(u, 0) for u in UPCARDS},
     }
 
 
-def load_all_models() -> dict[str, dict]:
+def latency_bucket(latency_ms: float) -> int:
+    return min(bisect_left(LATENCY_BUCKETS_MS, latency_ms), len(LATENCY_BUCKETS_MS) - 1)
+
+
+def summarize_calls(
+    latency_counts: list[int],
+    input_tokens: int,
+    output_tokens: int,
+    retries: int,
+    errors: Counter,
+) -> dict:
+    calls = sum(latency_counts)
+    percentiles = {}
+    histogram = {}
+    if calls:
+        cumulative = np.cumsum(latency_counts)
+        for name, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+            bucket = int(np.searchsorted(cumulative, q * calls))
+            percentiles[name] = round(LATENCY_BUCKETS_MS[bucket], 1)
+        used = [i for i, count in enumerate(latency_counts) if count]
+        for i in range(used[0], used[-1] + 1):
+            histogram[f"{LATENCY_BUCKETS_MS[i]:.3g}"] = latency_counts[i]
+    return {
+        "model_calls": calls,
+        "latency_percentiles": percentiles,
+        "latency_histogram": histogram,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "tokens_per_call": (input_tokens + output_tokens) / calls if calls else 0,
+        "retries": retries,
+        "call_errors": dict(errors),
+    }
+
+
+@dataclass
+class StatsAccumulator:
+    decisions: int = 0
+    hands: int = 0
+    mistakes: int = 0
+    balance: float = 0.0
+    ev_lost: float = 0.0
+    mistake_types: Counter = field(default_factory=Counter)
+    by_value: Counter = field(default_factory=Counter)
+    by_upcard: Counter = field(default_factory=Counter)
+    latency_counts: list[int] = field(
+        default_factory=lambda: [0] * len(LATENCY_BUCKETS_MS)
+    )
+    input_tokens: int = 0
+    output_tokens: int = 0
+    retries: int = 0
+    errors: Counter = field(default_factory=Counter)
+
+    def add(self, row: dict):
+        self.decisions += 1
+        if row.get("latency_ms"):
+            self.latency_counts[latency_bucket(float(row["latency_ms"]))] += 1
+            self.input_tokens += int(row["input_tokens"])
+            self.output_tokens += int(row["output_tokens"])
+            self.retries += int(row["retries"])
+        if row.get("retry_error"):
+            self.errors[row["retry_error"]] += 1
+        if row.get("ev_lost"):
+            self.ev_lost += float(row["ev_lost"])
+        if row["result"]:
+            self.hands += 1
+            self.balance += float(row["balance_change"])
+        action, optimal = row["action"], row["optimal_action"]
+        if action != optimal:
+            self.mistakes += 1
+            self.mistake_types[optimal, action] += 1
+            self.by_value[int(row["player_value"])] += 1
+            self.by_upcard[upcard_rank(row["dealer_upcard"])] += 1
+
+    def result(self) -> dict:
+        return {
+            "total_decisions": self.decisions,
+            "hands": self.hands,
+            "mistakes": self.mistakes,
+            "accuracy": (1 - self.mistakes / self.decisions) * 100
+            if self.decisions
+            else 0,
+            "balance": self.balance,
+            "ev_lost": self.ev_lost,
+            "ev_lost_per_hand": self.ev_lost / self.hands if self.hands else 0,
+            **summarize_mistakes(self.mistake_types, self.by_value, self.by_upcard),
+            **summarize_calls(
+                self.latency_counts,
+                self.input_tokens,
+                self.output_tokens,
+                self.retries,
+                self.errors,
+            ),
+        }
+
+
+def with_ev(rows: Iterator[dict]) -> Iterator[dict]:
+    first = next(rows, None)
+    if first is None:
+        return
+    rows = chain([first], rows)
+    yield from rows if "ev_lost" in first else iter_annotated(rows)
+
+
+def is_llm(strategy: str) -> bool:
+    return strategy == "llm" or strategy.startswith("llm@")
+
+
+def get_model_stats(records: Iterable[dict], ev_lost: float | None = None) -> dict:
+    stats = StatsAccumulator()
+    rows = (r for r in records if is_llm(r["strategy"]))
+    for record in rows if ev_lost is not None else with_ev(rows):
+        stats.add(record)
+    if ev_lost is not None:
+        stats.ev_lost = ev_lost
+    return stats.result()
+
+
+def count_pairs(optimal: np.ndarray, actions: np.ndarray) -> Counter:
+    if not len(actions):
+        return Counter()
+    pairs, counts = np.unique(np.stack([optimal, actions]), axis=1, return_counts=True)
+    return Counter(dict(zip(map(tuple, pairs.T.tolist()), counts.tolist())))
+
+
+def get_columnar_stats(columns: Columns, ev_lost: float | None = None) -> dict:
+    strategy = columns["strategy"]
+    llm = (strategy == "llm") | np.char.startswith(strategy, "llm@")
+    action = columns["action"][llm]
+    optimal = columns["optimal_action"][llm]
+    wrong = action != optimal
+
+    if ev_lost is None and "ev_lost" in columns:
+        ev_lost = float(np.nansum(columns["ev_lost"][llm], dtype=np.float64))
+    elif ev_lost is None:
+        llm_records = iter_annotated(to_rows(columns, llm))
+        ev_lost = sum(float(r["ev_lost"]) for r in llm_records if r["ev_lost"])
+
+    balance = columns["balance_change"][llm]
+    total_balance = float(np.nansum(balance, dtype=np.float64))
+    hands = int(np.count_nonzero(~np.isnan(balance)))
+
+    mistake_types = count_pairs(optimal[wrong], action[wrong])
+
+    values, counts = np.unique(columns["player_value"][llm][wrong], return_counts=True)
+    by_value = Counter(dict(zip(values.tolist(), counts.tolist())))
+
+    by_upcard = Counter()
+    labels, counts = np.unique(columns["dealer_upcard"][llm][wrong], return_counts=True)
+    for label, count in zip(labels.tolist(), counts.tolist()):
+        by_upcard[upcard_rank(label)] += count
+
+    latency_counts = [0] * len(LATENCY_BUCKETS_MS)
+    totals = {"input_tokens": 0, "output_tokens": 0, "retries": 0}
+    errors = Counter()
+    if "latency_ms" in columns:
+        latency = columns["latency_ms"][llm]
+        called = ~np.isnan(latency)
+        buckets = np.searchsorted(LATENCY_BUCKETS_MS, latency[called])
+        latency_counts = np.bincount(
+            np.minimum(buckets, len(LATENCY_BUCKETS_MS) - 1),
+            minlength=len(LATENCY_BUCKETS_MS),
+        ).tolist()
+        for name in totals:
+            totals[name] = int(columns[name][llm][called].sum(dtype=np.float64))
+        names, counts = np.unique(columns["retry_error"][llm], return_counts=True)
+        errors = Counter(dict(zip(names.tolist(), counts.tolist())))
+        del errors[""]
+
+    total = int(llm.sum())
+    mistakes = int(wrong.sum())
+    return {
+        "total_decisions": total,
+        "hands": hands,
+        "mistakes": mistakes,
+        "accuracy": (1 - mistakes / total) * 100 if total else 0,
+        "balance": total_balance,
+        "ev_lost": ev_lost,
+        "ev_lost_per_hand": ev_lost / hands if hands else 0,
+        **summarize_mistakes(mistake_types, by_value, by_upcard),
+        **summarize_calls(
+            latency_counts,
+            totals["input_tokens"],
+            totals["output_tokens"],
+            totals["retries"],
+            errors,
+        ),
+    }
+
+
+def source_path(path: Path) -> Path:
+    columnar = columnar_path(path)
+    if columnar.exists() and (
+        not path.exists() or columnar.stat().st_mtime >= path.stat().st_mtime
+    ):
+        return columnar
+    return path
+
+
+def load_stats(source: Path, ev_lost: float | None = None) -> dict:
+    if source.suffix == ".npz":
+        return get_columnar_stats(read_columns(source), ev_lost)
+    return get_model_stats(iter_csv(source), ev_lost)
+
+
+def file_signature(path: Path) -> list[int]:
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class StatsCache:
+    def __init__(self, path: Path | None = STATS_CACHE_PATH):
+        self.path = path
+        self.entries: dict[str, dict] = {}
+        self.ev_entries: dict[str, dict] = {}
+        self.hits = 0
+        self.misses = 0
+        if path and path.exists():
+            try:
+                data = json.loads(path.read_text())
+            except json.JSONDecodeError:
+                data = {}
+            if data.get("version") == STATS_VERSION:
+                self.entries = data["entries"]
+            if data.get("ev_version") == EV_VERSION:
+                self.ev_entries = data["ev"]
+
+    def get(self, source: Path) -> dict:
+        key = str(source)
+        signature = file_signature(source)
+        entry = self.entries.get(key)
+        if entry and entry["signature"] == signature:
+            self.hits += 1
+            return entry["stats"]
+        self.misses += 1
+        ev = self.ev_entries.get(key)
+        ev_lost = ev["ev_lost"] if ev and ev["signature"] == signature else None
+        stats = load_stats(source, ev_lost)
+        self.entries[key] = {"signature": signature, "stats": stats}
+        self.ev_entries[key] = {"signature": signature, "ev_lost": stats["ev_lost"]}
+        return stats
+
+    def save(self, sources: list[Path]):
+        if not self.path:
+            return
+        keep = {str(source) for source in sources}
+        data = {
+            "version": STATS_VERSION,
+            "entries": {k: v for k, v in self.entries.items() if k in keep},
+            "ev_version": EV_VERSION,
+            "ev": {k: v for k, v in self.ev_entries.items() if k in keep},
+        }
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data))
+        tmp.replace(self.path)
+
+
+def benchmark_paths() -> list[Path]:
+    paths = {path.with_suffix(".csv") for path in BENCHMARK_DIR.rglob("*.csv")}
+    paths |= {path.with_suffix(".csv") for path in BENCHMARK_DIR.rglob("*.npz")}
+    return sorted(paths)
+
+
+def load_all_models(cache: StatsCache | None = None) -> dict[str, dict]:
+    cache = cache or StatsCache(None)
     models = {}
-    for csv_path in BENCHMARK_DIR.rglob("*.csv"):
+    sources = []
+    for csv_path in benchmark_paths():
         model_id = csv_path.stem
         info = MODEL_INFO.get(model_id, {"name": model_id, "provider": "Unknown"})
-        records = load_csv(csv_path)
-        stats = get_model_stats(records)
-        stats["provider"] = info["provider"]
-        stats["model_id"] = model_id
-        models[info["name"]] = stats
+        source = source_path(csv_path)
+        sources.append(source)
+        stats = cache.get(source)
+        models[info["name"]] = {
+            **stats,
+            "provider": info["provider"],
+            "model_id": model_id,
+        }
+    cache.save(sources)
     return models
 
 
 def create_leaderboard_table(models: dict[str, dict]) -> str:
-    sorted_models = sorted(models.items(), key=lambda x: x[1]["accuracy"], reverse=True)
+    sorted_models = sorted(models.items(), key=lambda x: x[1]["ev_lost_per_hand"])
 
     rows = []
     for rank, (name, stats) in enumerate(sorted_models, 1):
@@ -106,7 +389,7 @@ def create_leaderboard_table(models: dict[str, dict]) -> str:
         balance_str = f"+{balance:.1f}" if balance >= 0 else f"{balance:.1f}"
 
         rows.append(f"""
-            <tr data-model="{name}" data-rank="{rank}" data-provider="{provider}" data-accuracy="{stats["accuracy"]:.2f}" data-balance="{stats["balance"]:.2f}" data-mistakes="{stats["mistakes"]}">
+            <tr data-model="{name}" data-rank="{rank}" data-provider="{provider}" data-accuracy="{stats["accuracy"]:.2f}" data-balance="{stats["balance"]:.2f}" data-ev_lost="{stats["ev_lost_per_hand"]:.6f}" data-mistakes="{stats["mistakes"]}">
                 <td class="rank">{rank}</td>
                 <td class="provider-cell" style="--accent-color: {color}">
                     <div class="provider-content">
@@ -119,6 +402,7 @@ def create_leaderboard_table(models: dict[str, dict]) -> str:
                 </td>
                 <td class="accuracy-cell">{stats["accuracy"]:.1f}%</td>
                 <td class="balance-cell" style="color: {balance_color}">{balance_str}</td>
+                <td class="ev-cell">{stats["ev_lost_per_hand"]:.4f} <span class="count">{stats["hands"]:,} hands</span></td>
                 <td class="mistakes-cell">{stats["mistakes"]}</td>
                 <td class="details-cell">
                     <button class="details-btn" onclick="openModal('{name}')" aria-label="View details">
@@ -139,10 +423,16 @@ def create_dashboard(models: dict[str, dict]) -> str:
             "provider": stats["provider"],
             "accuracy": stats["accuracy"],
             "balance": stats["balance"],
+            "ev_lost": stats["ev_lost"],
             "mistakes": stats["mistakes"],
             "error_counts": stats["error_counts"],
             "tendency_counts": stats["tendency_counts"],
             "mistakes_by_value": stats["mistakes_by_value"],
+            "mistakes_by_upcard": stats["mistakes_by_upcard"],
+            "model_calls": stats["model_calls"],
+            "latency_percentiles": stats["latency_percentiles"],
+            "latency_histogram": stats["latency_histogram"],
+            "tokens_per_call": stats["tokens_per_call"],
         }
         for name, stats in models.items()
     })
@@ -386,6 +676,14 @@ def create_dashboard(models: dict[str, dict]) -> str:
         .balance-cell {{
             font-weight: 500;
         }}
+        .ev-cell {{
+            font-weight: 500;
+        }}
+        .ev-cell .count {{
+            font-weight: 400;
+            font-size: 0.8em;
+            color: var(--text-secondary);
+        }}
         .mistakes-cell {{
             color: var(--text-secondary);
         }}
@@ -414,7 +712,7 @@ def create_dashboard(models: dict[str, dict]) -> str:
                 overflow-x: auto;
             }}
             .leaderboard table {{
-                min-width: 550px;
+                min-width: 620px;
             }}
         }}
 
@@ -552,8 +850,9 @@ def create_dashboard(models: dict[str, dict]) -> str:
                         <th>#</th>
                         <th>Provider</th>
                         <th>Model</th>
-                        <th class="sortable sorted" data-sort="accuracy" data-type="number" onclick="sortTable(this)">Accuracy<span class="sort-icon"><svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2.5" stroke-linecap="round" stroke-linejoin="round"><path d="M12 5v14M5 12l7 7 7-7"/></svg></span></th>
+                        <th class="sortable" data-sort="accuracy" data-type="number" onclick="sortTable(this)">Accuracy<span class="sort-icon"><svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2.5" stroke-linecap="round" stroke-linejoin="round"><path d="M7 15l5 5 5-5M7 9l5-5 5 5"/></svg></span></th>
                         <th class="sortable" data-sort="balance" data-type="number" onclick="sortTable(this)">Balance<span class="sort-icon"><svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2.5" stroke-linecap="round" stroke-linejoin="round"><path d="M7 15l5 5 5-5M7 9l5-5 5 5"/></svg></span></th>
+                        <th class="sortable sorted" data-sort="ev_lost" data-type="number" onclick="sortTable(this)" title="Expected units lost versus the best play, per hand played">EV Lost / Hand<span class="sort-icon"><svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2.5" stroke-linecap="round" stroke-linejoin="round"><path d="M12 19V5M5 12l7-7 7 7"/></svg></span></th>
                         <th class="sortable" data-sort="mistakes" data-type="number" onclick="sortTable(this)">Mistakes<span class="sort-icon"><svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2.5" stroke-linecap="round" stroke-linejoin="round"><path d="M7 15l5 5 5-5M7 9l5-5 5 5"/></svg></span></th>
                         <th></th>
                     </tr>
@@ -628,6 +927,12 @@ def create_dashboard(models: dict[str, dict]) -> str:
                     <div class="chart-container full">
                         <div id="chart-by-value"></div>
                     </div>
+                    <div class="chart-container full">
+                        <div id="chart-by-upcard"></div>
+                    </div>
+                    <div class="chart-container full" id="latency-container">
+                        <div id="chart-latency"></div>
+                    </div>
                 </div>
             </div>
         </div>
@@ -758,6 +1063,36 @@ def create_dashboard(models: dict[str, dict]) -> str:
                 yaxis: {{showgrid: true, gridcolor: colors.grid, title: {{text: 'Mistakes', font: {{size: 11}}}}}},
                 height: 250
             }}, config);
+
+            Plotly.newPlot('chart-by-upcard', [{{
+                x: Object.keys(data.mistakes_by_upcard),
+                y: Object.values(data.mistakes_by_upcard),
+                type: 'bar',
+                marker: {{color: colors.accent}}
+            }}], {{
+                ...layoutBase,
+                title: {{text: 'Mistakes by Dealer Upcard', font: {{size: 14}}}},
+                xaxis: {{showgrid: false, type: 'category', title: {{text: 'Dealer Upcard', font: {{size: 11}}}}}},
+                yaxis: {{showgrid: true, gridcolor: colors.grid, title: {{text: 'Mistakes', font: {{size: 11}}}}}},
+                height: 250
+            }}, config);
+
+            document.getElementById('latency-container').style.display = data.model_calls ? '' : 'none';
+            if (data.model_calls) {{
+                const p = data.latency_percentiles;
+                Plotly.newPlot('chart-latency', [{{
+                    x: Object.keys(data.latency_histogram),
+                    y: Object.values(data.latency_histogram),
+                    type: 'bar',
+                    marker: {{color: colors.accent}}
+                }}], {{
+                    ...layoutBase,
+                    title: {{text: `Model Call Latency (p50 ${{p.p50}} ms, p95 ${{p.p95}} ms, p99 ${{p.p99}} ms, ${{Math.round(data.tokens_per_call)}} tokens/call)`, font: {{size: 14}}}},
+                    xaxis: {{showgrid: false, type: 'category', title: {{text: 'Latency up to (ms)', font: {{size: 11}}}}}},
+                    yaxis: {{showgrid: true, gridcolor: colors.grid, title: {{text: 'Calls', font: {{size: 11}}}}}},
+                    height: 250
+                }}, config);
+            }}
         }}
 
         function toggleTheme() {{
@@ -777,7 +1112,7 @@ def create_dashboard(models: dict[str, dict]) -> str:
             if (e.key === 'Escape') closeModal();
         }});
 
-        let currentSort = {{ column: 'accuracy', ascending: false }};
+        let currentSort = {{ column: 'ev_lost', ascending: true }};
 
         function sortTable(th) {{
             const column = th.dataset.sort;
@@ -838,13 +1173,65 @@ def create_dashboard(models: dict[str, dict]) -> str:
     return html
 
 
-def main():
-    models = load_all_models()
-    html = create_dashboard(models)
-
-    output_path = Path("index.html")
+def build(output_path: Path, cache: StatsCache):
+    started = time.perf_counter()
+    hits, misses = cache.hits, cache.misses
+    html = create_dashboard(load_all_models(cache))
     output_path.write_text(html)
-    print(f"Dashboard saved to {output_path}")
+    elapsed = time.perf_counter() - started
+    print(
+        f"Dashboard saved to {output_path} in {elapsed:.2f}s "
+        f"({cache.misses - misses} rebuilt, {cache.hits - hits} cached)"
+    )
+
+
+def snapshot() -> dict[Path, list[int]]:
+    paths = [*BENCHMARK_DIR.rglob("*.csv"), *BENCHMARK_DIR.rglob("*.npz")]
+    return {path: file_signature(path) for path in paths}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the benchmark dashboard")
+    parser.add_argument(
+        "-o", "--output", type=Path, default=Path("index.html"), help="Output file"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Recompute every model's stats instead of reusing unchanged ones",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Rebuild whenever a benchmark file changes",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="Seconds between checks for changed files with --watch",
+    )
+    args = parser.parse_args()
+
+    cache = StatsCache(None if args.no_cache else STATS_CACHE_PATH)
+    build(args.output, cache)
+    if not args.watch:
+        return
+
+    print(f"Watching {BENCHMARK_DIR}/ for changes (Ctrl+C to stop)")
+    seen = snapshot()
+    try:
+        while True:
+            time.sleep(args.interval)
+            try:
+                current = snapshot()
+            except FileNotFoundError:
+                continue
+            if current != seen:
+                seen = current
+                build(args.output, cache)
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == "__main__":